@@ -0,0 +1,109 @@
+"""Hromadná konfigurace elementů podle pravidel
+
+Pravidlo je slovník nepovinných podmínek, element musí splnit všechny:
+
+    id_pattern – regulární výraz hledaný v id elementu
+    tags       – povolené tagy (např. ['path', 'polygon'])
+    parent     – id nejbližší nadřazené skupiny
+    fill       – barva výplně (i zděděná, porovnává se normalizovaná)
+    region     – obdélník (min_x, min_y, max_x, max_y), ve kterém musí
+                 ležet celá obálka elementu; potřebuje geometrii mapy
+
+Odpovídající elementy dostanou stejný typ oblasti a pole ze šablony,
+v textech šablony se nahradí {id} a {n} (pořadí elementu od 1).
+"""
+
+import re
+
+# Pole šablony (název, popis) podle typu oblasti
+TEMPLATE_FIELDS = {
+    'enclosure': ('enclosureName', 'enclosureDescription'),
+    'facility': ('facilityName', None),
+    'area': ('areaName', 'areaDescription'),
+}
+
+# Oblast výběhu, který ji ještě nemá (první volba konfiguračního panelu)
+DEFAULT_ZONE = 'Afrika'
+
+def normalize_color(value):
+    """Barva pro porovnání – malá písmena, #abc rozepsané na #aabbcc"""
+    if not value:
+        return None
+    value = value.strip().lower()
+    if re.fullmatch(r'#[0-9a-f]{3}', value):
+        value = '#' + ''.join(c * 2 for c in value[1:])
+    return value
+
+def _region_ids(geometry, region):
+    """Id elementů, jejichž obálka leží celá uvnitř obdélníku"""
+    min_x, min_y, max_x, max_y = region
+    rows = geometry.index.query_rect(min_x, min_y, max_x, max_y)
+    boxes = geometry.bboxes[rows]
+    inside = (boxes[:, 0] >= min_x) & (boxes[:, 1] >= min_y) & (boxes[:, 2] <= max_x) & (boxes[:, 3] <= max_y)
+    return {geometry.ids[row] for row in rows[inside]}
+
+def match_elements(elements, rule, geometry=None):
+    """Id elementů (v pořadí seznamu), které splňují všechny podmínky pravidla
+
+    Při neplatném regulárním výrazu nebo oblasti bez geometrie vyhodí ValueError.
+    """
+    tests = []
+    if rule.get('id_pattern'):
+        try:
+            pattern = re.compile(rule['id_pattern'])
+        except re.error as e:
+            raise ValueError(f"Neplatný regulární výraz: {e}") from e
+        tests.append(lambda elem: pattern.search(elem['id']) is not None)
+    if rule.get('tags'):
+        tags = set(rule['tags'])
+        tests.append(lambda elem: elem['tag'] in tags)
+    if rule.get('parent'):
+        parent = rule['parent']
+        tests.append(lambda elem: elem.get('parent') == parent)
+    if rule.get('fill'):
+        fill = normalize_color(rule['fill'])
+        tests.append(lambda elem: normalize_color(elem.get('fill')) == fill)
+    if rule.get('region'):
+        if geometry is None:
+            raise ValueError("Výběr oblastí potřebuje geometrii mapy")
+        region_ids = _region_ids(geometry, rule['region'])
+        tests.append(lambda elem: elem['id'] in region_ids)
+
+    return [elem['id'] for elem in elements if all(test(elem) for test in tests)]
+
+def template_fields(area_type, name='', description=''):
+    """Pole šablony pro daný typ oblasti (klíče jako v konfiguračním panelu)"""
+    if area_type.startswith('enclosure'):
+        name_field, description_field = TEMPLATE_FIELDS['enclosure']
+    elif area_type == 'facility':
+        name_field, description_field = TEMPLATE_FIELDS['facility']
+    else:
+        name_field, description_field = TEMPLATE_FIELDS['area']
+
+    fields = {name_field: name}
+    if description_field:
+        fields[description_field] = description
+    return fields
+
+def build_updates(element_ids, area_type, template, configurations, overwrite=False):
+    """Nové konfigurace pro hromadné uložení {id: konfigurace}
+
+    Už nakonfigurované elementy se bez `overwrite` přeskočí. Výběhy
+    si ponechají oblast, zvířata a časy krmení z předchozí konfigurace.
+    """
+    updates = {}
+    for n, element_id in enumerate(element_ids, start=1):
+        previous = configurations.get(element_id)
+        if previous is not None and not overwrite:
+            continue
+
+        config = {'areaType': area_type, 'elementId': element_id}
+        for field, value in template.items():
+            config[field] = value.replace('{id}', element_id).replace('{n}', str(n)) \
+                if isinstance(value, str) else value
+        if area_type.startswith('enclosure'):
+            config.setdefault('zone', (previous or {}).get('zone') or DEFAULT_ZONE)
+            config['feedingTimes'] = list((previous or {}).get('feedingTimes', []))
+            config['animals'] = list((previous or {}).get('animals', []))
+        updates[element_id] = config
+    return updates
@@ -0,0 +1,119 @@
+"""Žurnál změn konfigurací – zpět, znovu a přehrání sezení z logu
+
+Konfigurace elementů se berou jako neměnné: změna nahradí celý slovník
+elementu novým a starý zůstává sdílený v historii. Záznam žurnálu proto
+drží jen dvojice (stará, nová konfigurace) změněných elementů, takže
+zpět i znovu stojí čas a paměť úměrné velikosti změny, ne projektu.
+
+Každá operace se zároveň zapisuje do logu (JSON Lines), ze kterého
+ConfigJournal.replay() sestaví stejný stav i historii.
+"""
+
+import json
+from collections import deque
+
+# Počet kroků, které lze vrátit zpět
+JOURNAL_MAX_ENTRIES = 200
+
+def _assign(configurations, values):
+    for element_id, config in values.items():
+        if config is None:
+            configurations.pop(element_id, None)
+        else:
+            configurations[element_id] = config
+
+class ConfigJournal:
+    """Historie změn slovníku konfigurací {id elementu: konfigurace}
+
+    Slovník konfigurací vlastní volající, žurnál ho jen upravuje na místě.
+    Konfigurace předané do apply() se už nesmí měnit.
+    """
+
+    def __init__(self, max_entries=JOURNAL_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._undo = deque(maxlen=max_entries)  # (popis, {id: (stará, nová)})
+        self._redo = []
+        self.log = []
+
+    @property
+    def undo_label(self):
+        """Popis kroku, který vrátí undo(), nebo None"""
+        return self._undo[-1][0] if self._undo else None
+
+    @property
+    def redo_label(self):
+        return self._redo[-1][0] if self._redo else None
+
+    def reset(self, configurations):
+        """Začne novou historii od daného stavu (načtení mapy, import)"""
+        self._undo.clear()
+        self._redo.clear()
+        self.log = [{'op': 'reset', 'configurations': dict(configurations)}]
+
+    def apply(self, configurations, changes, label=''):
+        """Provede změny {id: nová konfigurace nebo None} jako jeden krok a vrátí změněná id"""
+        entry = {}
+        for element_id, config in changes.items():
+            old = configurations.get(element_id)
+            if old is not config and old != config:
+                entry[element_id] = (old, config)
+        if not entry:
+            return set()
+
+        _assign(configurations, {element_id: new for element_id, (_, new) in entry.items()})
+        self._undo.append((label, entry))
+        self._redo.clear()
+        self.log.append({
+            'op': 'apply',
+            'label': label,
+            'changes': {element_id: new for element_id, (_, new) in entry.items()}
+        })
+        return set(entry)
+
+    def undo(self, configurations):
+        """Vrátí poslední krok; vrátí změněná id (prázdná množina, když není co vracet)"""
+        if not self._undo:
+            return set()
+        label, entry = self._undo.pop()
+        _assign(configurations, {element_id: old for element_id, (old, _) in entry.items()})
+        self._redo.append((label, entry))
+        self.log.append({'op': 'undo'})
+        return set(entry)
+
+    def redo(self, configurations):
+        """Zopakuje naposledy vrácený krok; vrátí změněná id"""
+        if not self._redo:
+            return set()
+        label, entry = self._redo.pop()
+        _assign(configurations, {element_id: new for element_id, (_, new) in entry.items()})
+        self._undo.append((label, entry))
+        self.log.append({'op': 'redo'})
+        return set(entry)
+
+    def log_lines(self):
+        """Log operací jako řádky JSON Lines"""
+        for record in self.log:
+            yield json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    @classmethod
+    def replay(cls, lines, max_entries=JOURNAL_MAX_ENTRIES):
+        """Sestaví žurnál a konfigurace přehráním logu; při neznámé operaci vyhodí ValueError"""
+        journal = cls(max_entries)
+        configurations = {}
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            op = record.get('op')
+            if op == 'reset':
+                configurations = dict(record['configurations'])
+                journal.reset(configurations)
+            elif op == 'apply':
+                journal.apply(configurations, record['changes'], record.get('label', ''))
+            elif op == 'undo':
+                journal.undo(configurations)
+            elif op == 'redo':
+                journal.redo(configurations)
+            else:
+                raise ValueError(f"Neznámá operace žurnálu: {op!r}")
+        return journal, configurations
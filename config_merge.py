@@ -0,0 +1,175 @@
+"""Porovnání a sloučení exportů konfigurace – dvoucestně i třícestně podle id elementu
+
+Exporty se nečtou celé do slovníku: iter_config_entries() dekóduje
+záznamy po jednom (json.JSONDecoder.raw_decode) a hned je porovná
+s aktuální konfigurací. Z nahraného exportu i ze společného základu se
+drží jen záznamy elementů, které se liší, v paměti tak vedle aktuální
+konfigurace zůstávají jen rozdíly.
+
+Změna jen na jedné straně se převezme automaticky, změny na obou
+stranách se slučují po polích a zbylé kolize se vrací jako konflikty.
+Bez základu (dvoucestně) se z nahraného exportu převezmou nové elementy
+a chybějící pole, smazání rozpoznat nelze.
+"""
+
+import json
+import re
+
+# Klíče exportu editoru – začíná-li jimi soubor, konfigurace jsou pod 'configurations'
+EXPORT_META_KEYS = ('timestamp', 'totalElements', 'configuredElements', 'configurations')
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+_MISSING = object()
+
+def _skip(text, index, expected=None):
+    """Přeskočí mezery a případně očekávaný znak; vrátí index dalšího znaku"""
+    index = _WHITESPACE_RE.match(text, index).end()
+    if expected is not None:
+        if text[index:index + 1] != expected:
+            raise ValueError(f"Neplatný JSON: na pozici {index} chybí '{expected}'")
+        index += 1
+    return index
+
+def _decode_key(text, index):
+    key, index = _DECODER.raw_decode(text, _skip(text, index))
+    if not isinstance(key, str):
+        raise ValueError(f"Neplatný JSON: klíč před pozicí {index} není řetězec")
+    return key, _skip(text, _skip(text, index, ':'))
+
+def _next_member(text, index):
+    """Index dalšího člena objektu, nebo None za jeho koncem (vrací i index za '}')"""
+    index = _skip(text, index)
+    if text[index:index + 1] == '}':
+        return None, index + 1
+    return _skip(text, index, ','), None
+
+def _iter_members(text, index):
+    """Členy objektu začínajícího na `index` jako (klíč, hodnota); vrátí index za objektem"""
+    index = _skip(text, index, '{')
+    if text[_skip(text, index):_skip(text, index) + 1] == '}':
+        return _skip(text, index) + 1
+    while True:
+        key, index = _decode_key(text, index)
+        value, index = _DECODER.raw_decode(text, index)
+        yield key, value
+        index, end = _next_member(text, index)
+        if index is None:
+            return end
+
+def iter_config_entries(text):
+    """Dvojice (id elementu, konfigurace) z exportu editoru nebo holého slovníku, po jedné
+
+    Při neplatném JSON vyhodí ValueError.
+    """
+    index = _skip(text, 0, '{')
+    if text[_skip(text, index):_skip(text, index) + 1] == '}':
+        return
+    exported = None
+    while True:
+        key, index = _decode_key(text, index)
+        if exported is None:
+            exported = key in EXPORT_META_KEYS
+        if not exported:
+            value, index = _DECODER.raw_decode(text, index)
+            yield key, value
+        elif key == 'configurations':
+            index = yield from _iter_members(text, index)
+        else:
+            _, index = _DECODER.raw_decode(text, index)
+        index, end = _next_member(text, index)
+        if index is None:
+            return
+
+def merge_fields(base, ours, theirs):
+    """Sloučí konfigurace jednoho elementu po polích
+
+    Vrátí (sloučená konfigurace, konfliktní pole); v konfliktních polích
+    zůstává naše hodnota.
+    """
+    merged, conflicts = {}, []
+    for field in dict.fromkeys([*ours, *theirs, *base]):
+        base_value = base.get(field, _MISSING)
+        our_value = ours.get(field, _MISSING)
+        their_value = theirs.get(field, _MISSING)
+        if our_value == their_value or their_value == base_value:
+            value = our_value
+        elif our_value == base_value:
+            value = their_value
+        else:
+            value = our_value
+            conflicts.append(field)
+        if value is not _MISSING:
+            merged[field] = value
+    return merged, conflicts
+
+def merge_configurations(ours, theirs_text, base_text=None):
+    """Sloučí nahraný export `theirs_text` do aktuálních konfigurací `ours`
+
+    S `base_text` (export, ze kterého obě strany vyšly) je sloučení
+    třícestné a převezme i smazání. Vrátí slovník:
+        changes   – {id: nová konfigurace nebo None} k promítnutí do `ours`
+        conflicts – [{id, ours, theirs, merged, fields}], `fields` jsou
+                    konfliktní pole, None pro smazání proti změně
+        unchanged – počet elementů, které jsou v obou verzích stejné
+    `ours` se nemění. Při neplatném JSON vyhodí ValueError.
+    """
+    # Z nahraného exportu se drží jen záznamy, které se od našich liší
+    differing, seen = {}, set()
+    for element_id, theirs in iter_config_entries(theirs_text):
+        seen.add(element_id)
+        if theirs != ours.get(element_id):
+            differing[element_id] = theirs
+    unchanged = len(seen) - len(differing)
+
+    changes, conflicts, bases = {}, [], {}
+    if base_text is not None:
+        for element_id, base in iter_config_entries(base_text):
+            if element_id in differing:
+                bases[element_id] = base
+            elif element_id not in seen and element_id in ours:
+                # Smazáno u nich – převzít, pokud se to u nás od základu nezměnilo
+                if ours[element_id] == base:
+                    changes[element_id] = None
+                else:
+                    conflicts.append({
+                        'id': element_id, 'ours': ours[element_id], 'theirs': None,
+                        'merged': ours[element_id], 'fields': None
+                    })
+
+    for element_id, theirs in differing.items():
+        base = bases.get(element_id)
+        our_config = ours.get(element_id)
+        if base is not None and theirs == base:
+            # Změněno jen u nás
+            continue
+        if our_config == base:
+            changes[element_id] = theirs
+        elif our_config is None:
+            conflicts.append({
+                'id': element_id, 'ours': None, 'theirs': theirs, 'merged': None, 'fields': None
+            })
+        else:
+            merged, fields = merge_fields(base or {}, our_config, theirs)
+            if fields:
+                conflicts.append({
+                    'id': element_id, 'ours': our_config, 'theirs': theirs, 'merged': merged, 'fields': fields
+                })
+            elif merged != our_config:
+                changes[element_id] = merged
+
+    return {'changes': changes, 'conflicts': conflicts, 'unchanged': unchanged}
+
+def resolve_conflict(conflict, take_theirs):
+    """Výsledná konfigurace konfliktu – automaticky sloučená pole plus vybraná strana"""
+    if conflict['fields'] is None:
+        return conflict['theirs'] if take_theirs else conflict['ours']
+    if not take_theirs:
+        return conflict['merged']
+    resolved = dict(conflict['merged'])
+    for field in conflict['fields']:
+        if field in conflict['theirs']:
+            resolved[field] = conflict['theirs'][field]
+        else:
+            resolved.pop(field, None)
+    return resolved
@@ -0,0 +1,103 @@
+"""Rozpis krmení napříč všemi výběhy – seřazená časová osa s dotazy přes bisect
+
+Časy krmení se v konfiguracích ukládají jako neseřazené řetězce 'HH:MM'.
+Rozpis je drží jako jeden seřazený seznam dvojic (minuta dne, id
+elementu), dotazy na nejbližší krmení i na úsek dne jsou proto
+logaritmické (plus velikost výsledku).
+"""
+
+import bisect
+import re
+
+MINUTES_PER_DAY = 24 * 60
+
+# Výchozí okno pro „nejbližší krmení“ (editor i exportovaná mapa)
+FEEDING_WINDOW_MINUTES = 30
+
+_TIME_RE = re.compile(r'\s*(\d{1,2}):(\d{2})\s*')
+
+def parse_feeding_time(text):
+    """Minuta dne z času 'HH:MM', pro neplatný čas None"""
+    match = _TIME_RE.fullmatch(str(text))
+    if not match:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+def format_minute(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+def feeding_minutes(config):
+    """Seřazené minuty krmení výběhu (bez neplatných a duplicitních časů)"""
+    if not config or not config.get('areaType', '').startswith('enclosure'):
+        return []
+    minutes = {parse_feeding_time(text) for text in config.get('feedingTimes', [])}
+    minutes.discard(None)
+    return sorted(minutes)
+
+class FeedingSchedule:
+    """Časová osa krmení všech výběhů
+
+    Položky jsou dvojice (minuta dne, id elementu) seřazené podle času.
+    Po změně konfigurace jednoho výběhu stačí update(), osa se nestaví znovu.
+    """
+
+    def __init__(self, configurations=None):
+        self._minutes_by_id = {}
+        entries = []
+        for element_id, config in (configurations or {}).items():
+            minutes = feeding_minutes(config)
+            if minutes:
+                self._minutes_by_id[element_id] = minutes
+                entries.extend((minute, element_id) for minute in minutes)
+        entries.sort()
+        self._entries = entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, element_id, config):
+        """Promítne uloženou, změněnou nebo smazanou (config=None) konfiguraci výběhu"""
+        entries = self._entries
+        for minute in self._minutes_by_id.pop(element_id, ()):
+            del entries[bisect.bisect_left(entries, (minute, element_id))]
+
+        minutes = feeding_minutes(config)
+        if minutes:
+            self._minutes_by_id[element_id] = minutes
+            for minute in minutes:
+                bisect.insort(entries, (minute, element_id))
+
+    def between(self, start, end):
+        """Krmení s minutou v intervalu [start, end) téhož dne"""
+        entries = self._entries
+        return entries[bisect.bisect_left(entries, (start,)):bisect.bisect_left(entries, (end,))]
+
+    def upcoming(self, minute, window=FEEDING_WINDOW_MINUTES):
+        """Krmení v příštích `window` minutách od `minute`, přes půlnoc pokračuje od rána"""
+        end = minute + min(window, MINUTES_PER_DAY)
+        entries = self.between(minute, min(end, MINUTES_PER_DAY))
+        if end > MINUTES_PER_DAY:
+            entries += self.between(0, end - MINUTES_PER_DAY)
+        return entries
+
+    def timeline(self):
+        """Celý den jako seřazený seznam (minuta, id elementu)"""
+        return list(self._entries)
+
+    def export_table(self, export_ids=None, window=FEEDING_WINDOW_MINUTES):
+        """Kompaktní osa pro datový blok exportu, None bez krmení
+
+        Klíče: t – seřazené minuty dne, e – id elementů ke každé minutě,
+        w – okno nejbližších krmení v minutách.
+        """
+        if not self._entries:
+            return None
+        export_ids = export_ids or {}
+        return {
+            't': [minute for minute, _ in self._entries],
+            'e': [export_ids.get(element_id, element_id) for _, element_id in self._entries],
+            'w': window,
+        }
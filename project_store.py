@@ -0,0 +1,119 @@
+"""Trvalé úložiště projektů – konfigurace elementů v SQLite podle otisku mapy
+
+Každá změna konfigurace se zapíše jako samostatný řádek (upsert jednoho
+elementu) ve vlastní transakci, celý projekt se nikdy nepřepisuje.
+Databáze běží v režimu WAL, takže zápis nečeká na čtení z jiných sezení
+a přerušený zápis nic nepoškodí. Po opětovném nahrání stejné mapy se
+projekt načte jedním dotazem přes primární klíč.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Proměnná prostředí s cestou k databázi projektů
+PROJECT_STORE_ENV = 'SVG_EDITOR_PROJECT_STORE'
+DEFAULT_PROJECT_STORE = 'svg_editor_projects.sqlite3'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS configurations (
+    digest TEXT NOT NULL,
+    element_id TEXT NOT NULL,
+    config TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (digest, element_id)
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO configurations (digest, element_id, config, updated) VALUES (?, ?, ?, ?)
+ON CONFLICT (digest, element_id) DO UPDATE SET config = excluded.config, updated = excluded.updated
+"""
+
+def project_store_path():
+    """Cesta k databázi projektů (z proměnné prostředí, jinak výchozí soubor)"""
+    return os.environ.get(PROJECT_STORE_ENV, DEFAULT_PROJECT_STORE)
+
+class ProjectStore:
+    """Konfigurace všech map v jedné databázi
+
+    Instance se sdílí mezi sezeními, jedno spojení je proto chráněné zámkem.
+    Chyby databáze propadají jako sqlite3.Error.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or project_store_path()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        # Ve WAL stačí NORMAL – po pádu procesu se ztratí nejvýš poslední transakce, nic se nepoškodí
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def load(self, digest):
+        """Všechny konfigurace mapy jako slovník {id elementu: konfigurace}"""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT element_id, config FROM configurations WHERE digest = ?', (digest,)
+            ).fetchall()
+        return {element_id: json.loads(config) for element_id, config in rows}
+
+    def count(self, digest):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM configurations WHERE digest = ?', (digest,)
+            ).fetchone()[0]
+
+    def save(self, digest, element_id, config):
+        """Uloží konfiguraci jednoho elementu; None ji smaže"""
+        if config is None:
+            self.delete(digest, element_id)
+            return
+        payload = json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._connection.execute(_UPSERT, (digest, element_id, payload, time.time()))
+
+    def save_many(self, digest, configurations):
+        """Uloží konfigurace více elementů jednou transakcí; None konfiguraci smaže"""
+        self._write(digest, configurations, replace=False)
+
+    def delete(self, digest, element_id):
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM configurations WHERE digest = ? AND element_id = ?', (digest, element_id)
+            )
+
+    def replace(self, digest, configurations):
+        """Nahradí celý projekt mapy jednou transakcí (import konfigurace)"""
+        self._write(digest, configurations, replace=True)
+
+    def _write(self, digest, configurations, replace):
+        now = time.time()
+        rows = [
+            (digest, element_id, json.dumps(config, ensure_ascii=False, separators=(',', ':')), now)
+            for element_id, config in configurations.items() if config is not None
+        ]
+        deleted = [(digest, element_id) for element_id, config in configurations.items() if config is None]
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                if replace:
+                    connection.execute('DELETE FROM configurations WHERE digest = ?', (digest,))
+                connection.executemany(
+                    'DELETE FROM configurations WHERE digest = ? AND element_id = ?', deleted
+                )
+                connection.executemany(_UPSERT, rows)
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
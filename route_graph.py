@@ -0,0 +1,219 @@
+"""Graf tras po mapě – propojení cest, výběhů a služeb a předpočítané nejkratší trasy
+
+Uzly jsou elementy nakonfigurované jako cesty (path-pedestrian,
+path-safari), výběhy a služby. Hrana vede mezi cestami, jejichž obrysy
+se dotýkají nebo kříží (s tolerancí), a mezi cestou a výběhem nebo
+službou, který k ní přiléhá. Kandidáty vybere prostorový index podle
+obálek, o hraně pak rozhodne vzdálenost úseček obrysů. Výběhy a služby
+jsou jen cíle, trasa přes ně nevede. Délka hrany je vzdálenost těžišť.
+
+Pro export se z každého cíle spočítá strom nejkratších cest (Dijkstra)
+a uloží se z něj jen trasy k ostatním cílům, stránka návštěvníka pak
+trasu jen poskládá z tabulky předchůdců.
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+ROUTE_PATH_TYPES = ('path-pedestrian', 'path-safari')
+
+# Tolerance dotyku obrysů jako podíl delší strany mapy
+ROUTE_TOUCH_FRACTION = 0.002
+
+# Kódování předchůdce v tabulce tras – znak s kódem ROUTE_CODE_OFFSET + pozice mezi sousedy
+ROUTE_CODE_OFFSET = 48
+ROUTE_NO_PREDECESSOR = '/'
+
+def is_route_destination(area_type):
+    return area_type.startswith('enclosure') or area_type == 'facility'
+
+def _point_segment_distances(points, starts, ends):
+    """Matice vzdáleností bodů (řádky) od úseček (sloupce)"""
+    direction = ends - starts
+    length_sq = (direction ** 2).sum(axis=1)
+    offset = points[:, None, :] - starts[None, :, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length_sq > 0, (offset * direction).sum(axis=2) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    nearest = starts[None, :, :] + t[:, :, None] * direction[None, :, :]
+    return np.hypot(points[:, None, 0] - nearest[:, :, 0], points[:, None, 1] - nearest[:, :, 1])
+
+def _crossing(a_starts, a_ends, b_starts, b_ends):
+    """Zda se některá úsečka A vlastním průsečíkem kříží s některou úsečkou B"""
+    def orientation(p, q, r):
+        return np.sign((q[..., 0] - p[..., 0]) * (r[..., 1] - p[..., 1])
+                       - (q[..., 1] - p[..., 1]) * (r[..., 0] - p[..., 0]))
+
+    p, q = a_starts[:, None, :], a_ends[:, None, :]
+    r, s = b_starts[None, :, :], b_ends[None, :, :]
+    return bool(np.any(
+        (orientation(p, q, r) * orientation(p, q, s) < 0) & (orientation(r, s, p) * orientation(r, s, q) < 0)
+    ))
+
+def _near_box(starts, ends, box, tolerance):
+    """Výběr úseček, jejichž obálka zasahuje do obálky `box` rozšířené o toleranci"""
+    min_x, min_y, max_x, max_y = box
+    return (
+        (np.minimum(starts[:, 0], ends[:, 0]) <= max_x + tolerance)
+        & (np.maximum(starts[:, 0], ends[:, 0]) >= min_x - tolerance)
+        & (np.minimum(starts[:, 1], ends[:, 1]) <= max_y + tolerance)
+        & (np.maximum(starts[:, 1], ends[:, 1]) >= min_y - tolerance)
+    )
+
+def outlines_touch(first, second, tolerance):
+    """Zda jsou obrysy (dvojice polí počátků a konců úseček) nejvýše `tolerance` od sebe"""
+    a_starts, a_ends = first
+    b_starts, b_ends = second
+    if not len(a_starts) or not len(b_starts):
+        return False
+    # Porovnávají se jen úsečky v dosahu obálky druhého obrysu
+    a_box = (min(a_starts[:, 0].min(), a_ends[:, 0].min()), min(a_starts[:, 1].min(), a_ends[:, 1].min()),
+             max(a_starts[:, 0].max(), a_ends[:, 0].max()), max(a_starts[:, 1].max(), a_ends[:, 1].max()))
+    b_box = (min(b_starts[:, 0].min(), b_ends[:, 0].min()), min(b_starts[:, 1].min(), b_ends[:, 1].min()),
+             max(b_starts[:, 0].max(), b_ends[:, 0].max()), max(b_starts[:, 1].max(), b_ends[:, 1].max()))
+    near = _near_box(a_starts, a_ends, b_box, tolerance)
+    a_starts, a_ends = a_starts[near], a_ends[near]
+    near = _near_box(b_starts, b_ends, a_box, tolerance)
+    b_starts, b_ends = b_starts[near], b_ends[near]
+    if not len(a_starts) or not len(b_starts):
+        return False
+
+    # Vzdálenost dvou úseček je nula při křížení, jinak nejmenší vzdálenost koncového bodu od druhé úsečky
+    a_points = np.vstack([a_starts, a_ends])
+    b_points = np.vstack([b_starts, b_ends])
+    return bool(
+        _point_segment_distances(a_points, b_starts, b_ends).min() <= tolerance
+        or _point_segment_distances(b_points, a_starts, a_ends).min() <= tolerance
+        or _crossing(a_starts, a_ends, b_starts, b_ends)
+    )
+
+class RouteGraph:
+    """Graf cest a cílů jedné mapy nad její geometrií (svg_geometry.MapGeometry)
+
+    Uzly jsou indexy do `ids`, `adjacency[i]` je slovník soused → délka hrany.
+    Elementy bez geometrie se do grafu nedostanou.
+    """
+
+    def __init__(self, geometry, configurations, tolerance=None):
+        self.ids, self.is_path = [], []
+        for element_id, config in configurations.items():
+            area_type = config.get('areaType', '')
+            is_path = area_type in ROUTE_PATH_TYPES
+            if (is_path or is_route_destination(area_type)) and geometry.row(element_id) is not None:
+                self.ids.append(element_id)
+                self.is_path.append(is_path)
+        self._nodes = {element_id: node for node, element_id in enumerate(self.ids)}
+        self.destinations = [node for node, is_path in enumerate(self.is_path) if not is_path]
+
+        if tolerance is None:
+            bboxes = geometry.bboxes
+            extent = max(bboxes[:, 2].max() - bboxes[:, 0].min(), bboxes[:, 3].max() - bboxes[:, 1].min()) \
+                if len(bboxes) else 0.0
+            tolerance = float(extent) * ROUTE_TOUCH_FRACTION
+        self.tolerance = tolerance
+
+        # Kandidáty hledá prostorový index, hranu potvrdí obrysy; cíle spolu přímo sousedit nemohou
+        self.adjacency = [{} for _ in self.ids]
+        centroids = geometry.centroids
+        outlines = {}
+        for node, element_id in enumerate(self.ids):
+            if not self.is_path[node]:
+                continue
+            x, y = centroids[geometry.row(element_id)]
+            for other_id in geometry.elements_near(element_id, tolerance):
+                other = self._nodes.get(other_id)
+                if other is None or other in self.adjacency[node]:
+                    continue
+                for outline_id in (element_id, other_id):
+                    if outline_id not in outlines:
+                        outlines[outline_id] = geometry.segments(outline_id)
+                if not outlines_touch(outlines[element_id], outlines[other_id], tolerance):
+                    continue
+                other_x, other_y = centroids[geometry.row(other_id)]
+                length = math.hypot(other_x - x, other_y - y)
+                self.adjacency[node][other] = self.adjacency[other][node] = length
+
+    def node(self, element_id):
+        return self._nodes.get(element_id)
+
+    def shortest_path_tree(self, source):
+        """Vzdálenosti a předchůdci všech uzlů od uzlu `source` (nedosažitelné: inf a -1)"""
+        distances = [math.inf] * len(self.ids)
+        predecessors = [-1] * len(self.ids)
+        distances[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > distances[node]:
+                continue
+            # Přes jiný cíl se nepokračuje
+            if node != source and not self.is_path[node]:
+                continue
+            for neighbor, length in self.adjacency[node].items():
+                candidate = distance + length
+                if candidate < distances[neighbor]:
+                    distances[neighbor] = candidate
+                    predecessors[neighbor] = node
+                    heapq.heappush(heap, (candidate, neighbor))
+        return distances, predecessors
+
+    def route(self, source_id, target_id):
+        """Id elementů na nejkratší trase od `source_id` do `target_id`, nebo None"""
+        source, target = self._nodes.get(source_id), self._nodes.get(target_id)
+        if source is None or target is None:
+            return None
+        distances, predecessors = self.shortest_path_tree(source)
+        if math.isinf(distances[target]):
+            return None
+        steps = [target]
+        while steps[-1] != source:
+            steps.append(predecessors[steps[-1]])
+        return [self.ids[node] for node in reversed(steps)]
+
+    def route_table(self):
+        """Kompaktní tabulka tras mezi cíli pro export, None když mapa nemá žádný cíl
+
+        Klíče: n – id uzlů ležících na některé trase mezi cíli (a všech cílů),
+        c – indexy cílů v `n`, a – sousedé každého uzlu (indexy v `n`),
+        p – pro každý cíl řetězec, jehož i-tý znak kóduje předchůdce uzlu i
+        ve stromu nejkratších cest z cíle jako pozici v a[i] (kód znaku
+        minus ROUTE_CODE_OFFSET, '/' bez předchůdce).
+        """
+        if not self.destinations:
+            return None
+
+        # Ze stromů se drží jen trasy k ostatním cílům, uzly mimo ně se do tabulky nedostanou
+        routes = []
+        used = set(self.destinations)
+        for source in self.destinations:
+            predecessors = self.shortest_path_tree(source)[1]
+            on_route = {}
+            for target in self.destinations:
+                node = target
+                while node != source and node >= 0 and node not in on_route:
+                    on_route[node] = predecessors[node]
+                    node = predecessors[node]
+            routes.append(on_route)
+            used.update(on_route)
+
+        nodes = sorted(used)
+        index = {node: i for i, node in enumerate(nodes)}
+        neighbors = [[index[other] for other in self.adjacency[node] if other in index] for node in nodes]
+        positions = [{other: k for k, other in enumerate(row)} for row in neighbors]
+
+        table = []
+        for on_route in routes:
+            codes = [ROUTE_NO_PREDECESSOR] * len(nodes)
+            for node, predecessor in on_route.items():
+                if predecessor >= 0:
+                    i = index[node]
+                    codes[i] = chr(ROUTE_CODE_OFFSET + positions[i][index[predecessor]])
+            table.append(''.join(codes))
+        return {
+            'n': [self.ids[node] for node in nodes],
+            'c': [index[node] for node in self.destinations],
+            'a': neighbors,
+            'p': table,
+        }
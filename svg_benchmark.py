@@ -0,0 +1,256 @@
+"""Benchmark jádra editoru na syntetických mapách zoo různé velikosti
+
+Vygeneruje mapy se 100 až 100 000 tvary ve vnořených skupinách, ke každé
+konfigurace s různou hustotou, změří čas jednotlivých fází zpracování
+a špičku alokované paměti a výsledky zapíše do JSON. Předchozí výsledky
+lze předat přes --compare pro porovnání mezi verzemi.
+
+Použití:
+    python svg_benchmark.py --sizes 100 1000 10000 --output bench.json
+"""
+
+import argparse
+import gc
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from svg_engine import (
+    ElementSearchIndex,
+    HighlightedDocument,
+    generate_interactive_svg,
+    iter_svg_elements,
+    load_svg_document,
+    render_svg_with_highlights,
+)
+from svg_geometry import MapGeometry
+from svg_preview import MapPreview
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_DENSITIES = [0.1, 0.5, 1.0]
+
+# Počet tvarů v jedné skupině a skupin v jedné zóně syntetické mapy
+SHAPES_PER_GROUP = 20
+GROUPS_PER_ZONE = 10
+
+AREA_TYPES = ['enclosure-pedestrian', 'enclosure-safari', 'path-pedestrian',
+              'path-safari', 'water', 'restricted', 'facility']
+
+def _synthetic_shape(rng, index, x, y):
+    """Vrátí jeden tvar mapy; zhruba každý pátý je bez id"""
+    id_attr = '' if index % 5 == 4 else f' id="shape_{index}"'
+    kind = index % 5
+    if kind == 0:
+        points = ' '.join(
+            f"{x + rng.uniform(0, 40):.6f},{y + rng.uniform(0, 40):.6f}" for _ in range(6)
+        )
+        return f'<polygon{id_attr} points="{points}" fill="#8fbc8f"/>'
+    if kind == 1:
+        return (f'<rect{id_attr} x="{x:.6f}" y="{y:.6f}" width="{rng.uniform(5, 40):.6f}" '
+                f'height="{rng.uniform(5, 40):.6f}" fill="#deb887"/>')
+    if kind == 2:
+        return f'<circle{id_attr} cx="{x:.6f}" cy="{y:.6f}" r="{rng.uniform(2, 10):.6f}" fill="#87ceeb"/>'
+    if kind == 3:
+        return (f'<ellipse{id_attr} cx="{x:.6f}" cy="{y:.6f}" rx="{rng.uniform(2, 20):.6f}" '
+                f'ry="{rng.uniform(2, 20):.6f}" fill="#f4a460"/>')
+    segments = ' '.join(
+        f"C {x + rng.uniform(0, 60):.6f} {y + rng.uniform(0, 60):.6f} "
+        f"{x + rng.uniform(0, 60):.6f} {y + rng.uniform(0, 60):.6f} "
+        f"{x + rng.uniform(0, 60):.6f} {y + rng.uniform(0, 60):.6f}"
+        for _ in range(3)
+    )
+    return f'<path{id_attr} d="M {x:.6f} {y:.6f} {segments} Z" fill="#dda0dd" stroke="#555"/>'
+
+def generate_synthetic_map(shape_count, seed=0):
+    """Vygeneruje SVG mapu s daným počtem tvarů ve vnořených skupinách (zóna → skupina → tvar)"""
+    rng = random.Random(seed)
+    side = max(1000, int(shape_count ** 0.5) * 50)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {side} {side}">']
+
+    index = 0
+    zone = 0
+    while index < shape_count:
+        parts.append(f'<g id="zone_{zone}" transform="translate({rng.randint(0, 50)},{rng.randint(0, 50)})">')
+        for group in range(GROUPS_PER_ZONE):
+            if index >= shape_count:
+                break
+            parts.append(f'<g id="zone_{zone}_group_{group}">')
+            for _ in range(min(SHAPES_PER_GROUP, shape_count - index)):
+                parts.append(_synthetic_shape(rng, index, rng.uniform(0, side), rng.uniform(0, side)))
+                index += 1
+            parts.append('</g>')
+        parts.append('</g>')
+        zone += 1
+
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+def generate_synthetic_configurations(elements, density, seed=0):
+    """Vytvoří konfigurace pro daný podíl elementů (tvary, ne skupiny)"""
+    rng = random.Random(seed)
+    shapes = [elem['id'] for elem in elements if elem['tag'] != 'g']
+    configured = rng.sample(shapes, int(len(shapes) * density))
+
+    configurations = {}
+    for n, element_id in enumerate(configured):
+        area_type = AREA_TYPES[n % len(AREA_TYPES)]
+        config = {'areaType': area_type, 'elementId': element_id}
+        if area_type.startswith('enclosure'):
+            config.update({
+                'enclosureName': f"Výběh {n}",
+                'enclosureDescription': "Syntetický výběh",
+                'zone': 'Afrika',
+                'feedingTimes': [f"{rng.randint(8, 17):02d}:{rng.choice(['00', '30'])}"],
+                'animals': [{'name': 'Lev', 'emoji': '🦁', 'id': 0}]
+            })
+        elif area_type == 'facility':
+            config.update({'facilityType': 'WC', 'facilityName': f"Služba {n}"})
+        else:
+            config.update({'areaName': f"Oblast {n}", 'areaDescription': ''})
+        configurations[element_id] = config
+    return configurations
+
+def _highlight_update(svg_content, elements, configurations):
+    """Záplata zvýrazněného dokumentu po změně jednoho elementu – co editor dělá po uložení
+
+    Volání střídají dva stavy konfigurací, takže každé vrátí neprázdnou záplatu.
+    """
+    document = HighlightedDocument(svg_content, configurations)
+    element_id = next(elem['id'] for elem in elements if elem['tag'] != 'g')
+    changed = dict(configurations)
+    if element_id in changed:
+        del changed[element_id]
+    else:
+        changed[element_id] = {'areaType': 'water', 'elementId': element_id}
+    states = [configurations, changed]
+
+    def update():
+        states.reverse()
+        return document.update(states[0])
+    return update
+
+def _stages(data, svg_content, elements, configurations):
+    """Měřené fáze zpracování – název a funkce bez argumentů"""
+    return [
+        ('load', lambda: load_svg_document(data, streaming=False)),
+        ('load_streaming', lambda: load_svg_document(data, streaming=True)),
+        ('iterparse', lambda: sum(1 for _ in iter_svg_elements(io.BytesIO(data)))),
+        ('search_index', lambda: ElementSearchIndex(elements, configurations)),
+        ('geometry', lambda: MapGeometry.from_svg(svg_content)),
+        ('preview_overview', lambda: MapPreview.from_svg(svg_content).render(0)),
+        ('render_highlights', lambda: render_svg_with_highlights(svg_content, configurations)),
+        ('highlight_document', lambda: HighlightedDocument(svg_content, configurations)),
+        ('highlight_update', _highlight_update(svg_content, elements, configurations)),
+        ('export', lambda: generate_interactive_svg(svg_content, configurations)),
+        ('export_optimized', lambda: generate_interactive_svg(svg_content, configurations, precision=2)),
+    ]
+
+def measure(func, repeat):
+    """Vrátí nejlepší čas z `repeat` běhů a špičku alokované paměti (samostatný běh)"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'seconds': min(timings), 'seconds_all': timings, 'peak_bytes': peak}
+
+def run_benchmarks(sizes, densities, repeat=3, seed=0, report=print):
+    """Projde všechny kombinace velikostí a hustot a vrátí seznam výsledků fází"""
+    results = []
+    for size in sizes:
+        svg_content = generate_synthetic_map(size, seed=seed)
+        data = svg_content.encode('utf-8')
+        document = load_svg_document(data)
+        svg_content = document['svg_content']
+
+        for density in densities:
+            configurations = generate_synthetic_configurations(document['elements'], density, seed=seed)
+            for stage, func in _stages(data, svg_content, document['elements'], configurations):
+                result = measure(func, repeat)
+                result.update({
+                    'stage': stage,
+                    'shapes': size,
+                    'elements': len(document['elements']),
+                    'density': density,
+                    'configured': len(configurations),
+                    'svg_bytes': len(data)
+                })
+                results.append(result)
+                report(
+                    f"{size:>7} tvarů  hustota {density:<4} {stage:<18} "
+                    f"{result['seconds'] * 1000:10.2f} ms  {result['peak_bytes'] / 1024 / 1024:8.1f} MB"
+                )
+    return results
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(previous, current, report=print):
+    """Vypíše poměr časů a paměti proti dřívějšímu běhu pro shodné fáze"""
+    def key(result):
+        return (result['stage'], result['shapes'], result['density'])
+    
+    before = {key(r): r for r in previous['results']}
+    for result in current['results']:
+        old = before.get(key(result))
+        if old and old['seconds'] > 0 and old['peak_bytes'] > 0:
+            report(
+                f"{result['shapes']:>7} tvarů  hustota {result['density']:<4} {result['stage']:<18} "
+                f"čas ×{result['seconds'] / old['seconds']:.2f}  "
+                f"paměť ×{result['peak_bytes'] / old['peak_bytes']:.2f}"
+            )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark zpracování SVG map zoo")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="počty tvarů syntetických map")
+    parser.add_argument('--densities', type=float, nargs='+', default=DEFAULT_DENSITIES,
+                        help="podíly nakonfigurovaných tvarů")
+    parser.add_argument('--repeat', type=int, default=3, help="počet opakování každé fáze")
+    parser.add_argument('--seed', type=int, default=0, help="semínko generátoru map")
+    parser.add_argument('--output', default='bench_results.json', help="výstupní JSON soubor")
+    parser.add_argument('--compare', help="JSON s dřívějšími výsledky pro porovnání")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.densities, repeat=args.repeat, seed=args.seed)
+    output = {
+        'timestamp': datetime.now().isoformat(),
+        'revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': results
+    }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"Výsledky uloženy do {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare_results(json.load(f), output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
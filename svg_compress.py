@@ -0,0 +1,100 @@
+"""Proudová serializace exportovaného SVG do komprimovaných variant (svgz, gzip, zlib, Brotli)
+
+Strom se serializuje jen jednou, každý kus výstupu se rovnou pošle všem
+kompresorům – celý dokument se v paměti nedrží ani jako text, ani jako
+nekomprimované bajty.
+"""
+
+import xml.etree.ElementTree as ET
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Varianty exportu – přípona souboru, MIME typ a použitý kodek
+EXPORT_FORMATS = {
+    'svg': {'label': 'SVG', 'suffix': '.svg', 'mime': 'image/svg+xml', 'codec': None},
+    'svgz': {'label': 'SVGZ (gzip)', 'suffix': '.svgz', 'mime': 'image/svg+xml', 'codec': 'gzip'},
+    'gzip': {'label': 'Předkomprimované gzip', 'suffix': '.svg.gz', 'mime': 'application/gzip', 'codec': 'gzip'},
+    'zlib': {'label': 'Předkomprimované zlib (deflate)', 'suffix': '.svg.zz', 'mime': 'application/zlib',
+             'codec': 'zlib'},
+    'br': {'label': 'Předkomprimované Brotli', 'suffix': '.svg.br', 'mime': 'application/x-brotli',
+           'codec': 'brotli'},
+}
+
+# Velikost textu, který se nasbírá před zakódováním a kompresí
+SERIALIZE_BUFFER_CHARS = 64 * 1024
+
+def available_formats():
+    """Varianty, které lze v tomto prostředí vytvořit (Brotli jen s balíčkem brotli)"""
+    return [name for name, spec in EXPORT_FORMATS.items() if spec['codec'] != 'brotli' or brotli is not None]
+
+def _compressor(codec, level):
+    if codec == 'gzip':
+        # wbits 16 + MAX_WBITS = hlavička a patička gzip
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+    if codec == 'zlib':
+        compressor = zlib.compressobj(level)
+        return compressor.compress, compressor.flush
+    if codec == 'brotli':
+        if brotli is None:
+            raise ValueError("Komprese Brotli vyžaduje balíček brotli")
+        compressor = brotli.Compressor(quality=min(11, level + 2))
+        return compressor.process, compressor.finish
+    raise ValueError(f"Neznámý kodek: {codec}")
+
+class _TeeWriter:
+    """Textový „soubor“ pro ElementTree.write, který rozesílá výstup kompresorům"""
+
+    def __init__(self, sinks, level):
+        self.raw_bytes = 0
+        self.written = {name: 0 for name, _ in sinks}
+        self._buffer = []
+        self._buffered = 0
+        self._streams = {}  # kodek → (compress, flush, [(formát, soubor)])
+        for name, sink in sinks:
+            codec = EXPORT_FORMATS[name]['codec']
+            if codec not in self._streams:
+                compress, flush = _compressor(codec, level) if codec else (None, None)
+                self._streams[codec] = (compress, flush, [])
+            self._streams[codec][2].append((name, sink))
+
+    def write(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= SERIALIZE_BUFFER_CHARS:
+            self._drain()
+        return len(text)
+
+    def _emit(self, targets, data):
+        if data:
+            for name, sink in targets:
+                sink.write(data)
+                self.written[name] += len(data)
+
+    def _drain(self):
+        data = ''.join(self._buffer).encode('utf-8')
+        self._buffer, self._buffered = [], 0
+        self.raw_bytes += len(data)
+        for compress, _, targets in self._streams.values():
+            self._emit(targets, compress(data) if compress else data)
+
+    def close(self):
+        self._drain()
+        for _, flush, targets in self._streams.values():
+            if flush:
+                self._emit(targets, flush())
+
+def write_svg_variants(root, sinks, level=9):
+    """Zapíše strom SVG do binárních souborů `sinks` – seznam dvojic (formát, soubor)
+
+    Stejný kodek se počítá jen jednou (svgz a gzip sdílejí výstup).
+    Vrátí velikost nekomprimovaného SVG a zapsané bajty podle formátu.
+    """
+    tee = _TeeWriter(sinks, level)
+    ET.ElementTree(root).write(tee, encoding='unicode')
+    tee.close()
+    return {'raw_bytes': tee.raw_bytes, 'written': tee.written}
@@ -1,154 +1,565 @@
 import streamlit as st
+import io
 import json
-import xml.etree.ElementTree as ET
+import os
+import sqlite3
+import uuid
+from collections import deque
 from datetime import datetime
-import base64
-import re
 
-# Konfigurace stránky
-st.set_page_config(
-    page_title="SVG Zoo Editor",
-    page_icon="🦁",
-    layout="wide",
-    initial_sidebar_state="expanded"
+from svg_engine import (
+    CLICKABLE_TAGS,
+    ElementSearchIndex,
+    HighlightedDocument,
+    SvgDocumentCache,
+    SvgEngineError,
+    build_interactive_tree,
+    load_svg_document,
+    stream_map_geometry,
+    svg_digest,
 )
+from bulk_rules import build_updates, match_elements, template_fields
+from config_journal import ConfigJournal
+from config_merge import merge_configurations, resolve_conflict
+from feeding_schedule import FEEDING_WINDOW_MINUTES, FeedingSchedule, format_minute
+from project_store import ProjectStore
+from svg_compress import EXPORT_FORMATS, available_formats, write_svg_variants
+from svg_geometry import MapGeometry
+from svg_map_component import resolve_click, svg_map
+from svg_metrics import MetricsFile, RerunMetrics
+from svg_optimize import DEDUP_DEFAULT_PRECISION, deduplicate_shapes, optimize_tree
+from svg_preview import MAX_ZOOM, MapPreview
 
-# CSS styly
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #2E8B57;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
+def setup_page():
+    """Nastaví stránku a vloží CSS styly (musí být první volání Streamlitu)"""
+    # Konfigurace stránky
+    st.set_page_config(
+        page_title="SVG Zoo Editor",
+        page_icon="🦁",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # CSS styly
+    st.markdown("""
+    <style>
+        .main-header {
+            font-size: 2.5rem;
+            color: #2E8B57;
+            text-align: center;
+            margin-bottom: 2rem;
+        }
+
+        .svg-container {
+            border: 2px solid #ddd;
+            border-radius: 10px;
+            padding: 20px;
+            background: white;
+            min-height: 400px;
+            overflow: auto;
+            max-height: 600px;
+        }
+
+        .animal-card {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 1rem;
+            border-radius: 10px;
+            color: white;
+            margin: 0.5rem 0;
+            cursor: pointer;
+            transition: all 0.3s ease;
+        }
+
+        .animal-card:hover {
+            transform: scale(1.02);
+            box-shadow: 0 4px 12px rgba(0,0,0,0.2);
+        }
+
+        .animal-card-selected {
+            background: linear-gradient(135deg, #20b2aa 0%, #008b8b 100%);
+            border: 2px solid #ff6b35;
+        }
+
+        .config-section {
+            background: #f8f9fa;
+            padding: 1.5rem;
+            border-radius: 10px;
+            margin: 1rem 0;
+            border-left: 4px solid #3498db;
+        }
+
+        .animal-item {
+            background: white;
+            padding: 10px;
+            margin: 5px 0;
+            border-radius: 5px;
+            border: 1px solid #ddd;
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+        }
+
+        .progress-bar {
+            background: #ddd;
+            border-radius: 10px;
+            overflow: hidden;
+            height: 25px;
+        }
+
+        .progress-fill {
+            background: linear-gradient(90deg, #3498db, #27ae60);
+            height: 100%;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            color: white;
+            font-weight: bold;
+            transition: width 0.3s ease;
+        }
+
+        .element-button {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            border: none;
+            padding: 8px 12px;
+            border-radius: 6px;
+            cursor: pointer;
+            transition: all 0.3s ease;
+            width: 100%;
+            margin: 2px 0;
+            text-align: left;
+        }
+
+        .element-button:hover {
+            transform: scale(1.02);
+            box-shadow: 0 2px 8px rgba(0,0,0,0.2);
+        }
+
+        .element-button-configured {
+            background: linear-gradient(135deg, #20b2aa 0%, #008b8b 100%);
+            border: 2px solid #ff6b35;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+def init_session_state():
+    """Inicializuje session state při prvním běhu"""
+    if 'svg_content' not in st.session_state:
+        st.session_state.svg_content = None
+    if 'configurations' not in st.session_state:
+        st.session_state.configurations = {}
+    if 'svg_elements' not in st.session_state:
+        st.session_state.svg_elements = []
+    if 'svg_element_ids' not in st.session_state:
+        st.session_state.svg_element_ids = frozenset()
+    if 'selected_element' not in st.session_state:
+        st.session_state.selected_element = None
+    if 'svg_digest' not in st.session_state:
+        st.session_state.svg_digest = None
+    if 'search_index' not in st.session_state:
+        st.session_state.search_index = None
+    if 'feeding_schedule' not in st.session_state:
+        st.session_state.feeding_schedule = None
+    if 'journal' not in st.session_state:
+        st.session_state.journal = ConfigJournal()
+        st.session_state.journal.reset(st.session_state.configurations)
+        st.session_state.config_import_digest = None
+    if 'map_click_nonce' not in st.session_state:
+        st.session_state.map_click_nonce = None
+    if 'highlighted_document' not in st.session_state:
+        st.session_state.highlighted_document = None
+        st.session_state.map_sent = None
+    if 'project_store_error' not in st.session_state:
+        st.session_state.project_store_error = None
+    if 'rerun_metrics' not in st.session_state:
+        st.session_state.rerun_metrics = deque(maxlen=RERUN_HISTORY_SIZE)
+        st.session_state.rerun_count = 0
+        st.session_state.metrics_session = uuid.uuid4().hex[:8]
+        st.session_state.metrics_file = os.environ.get('SVG_EDITOR_METRICS_FILE', 'svg_editor_metrics.prom')
+        st.session_state.metrics_to_file = 'SVG_EDITOR_METRICS_FILE' in os.environ
+        st.session_state.metrics_error = None
+
+# Počet posledních rerunů zobrazených v debug informacích
+RERUN_HISTORY_SIZE = 20
+
+# Počet map, jejichž náhled (geometrie a dlaždice) se drží v paměti
+PREVIEW_CACHE_MAX_MAPS = 4
+
+# Počet map, jejichž geometrie (bez stromu dokumentu) se drží v paměti
+GEOMETRY_CACHE_MAX_MAPS = 8
+
+# Od této velikosti SVG se mapa ve výchozím stavu zobrazuje zjednodušeně
+PREVIEW_THRESHOLD_BYTES = 2 * 1024 * 1024
+
+# Okolí elementu – vzdálenost jako násobek jeho větší strany a počet zobrazených sousedů
+NEARBY_DISTANCE_FACTOR = 1.0
+NEARBY_LIMIT = 5
+
+# Stránkování gridu elementů a přehledu nakonfigurovaných elementů
+GRID_PAGE_SIZES = [24, 48, 96, 192]
+GRID_DEFAULT_PAGE_SIZE = 48
+
+# Do tolika změněných elementů se indexy upravují po jednom, nad to se postaví znovu
+INCREMENTAL_SYNC_MAX_CHANGES = 50
+
+# Počet konfliktů sloučení s vlastní volbou, ostatní se řeší výchozí volbou
+MERGE_CONFLICTS_SHOWN = 50
+
+# Typy oblastí a služeb v pořadí nabídky
+AREA_TYPE_LABELS = {
+    "enclosure-pedestrian": "🚶 Výběh - pěší část",
+    "enclosure-safari": "🚗 Výběh - safari",
+    "path-pedestrian": "🛤️ Cesta - pěší",
+    "path-safari": "🛣️ Cesta - safari",
+    "water": "💧 Vodní plocha",
+    "restricted": "🚫 Zázemí zoo",
+    "facility": "🏢 Služba/budova"
+}
+FACILITY_TYPE_LABELS = {
+    "WC": "🚻 Toalety",
+    "Restaurant": "🍽️ Restaurace",
+    "Shop": "🛍️ Obchod",
+    "Info": "ℹ️ Informace",
+    "FirstAid": "🏥 První pomoc",
+    "Parking": "🅿️ Parkování"
+}
+
+# Geografické oblasti výběhů v pořadí nabídky
+ZONES = ["Afrika", "Asie", "Evropa", "Amerika", "Austrálie", "Antarktida", "Světové"]
+
+@st.cache_resource(show_spinner=False)
+def get_document_cache():
+    """Sdílená instance cache dokumentů (přežívá reruny i sezení)"""
+    return SvgDocumentCache()
+
+def get_search_index():
+    """Vrátí vyhledávací index aktuálních elementů, po načtení mapy ho postaví znovu"""
+    if st.session_state.search_index is None:
+        st.session_state.search_index = ElementSearchIndex(
+            st.session_state.svg_elements,
+            st.session_state.configurations
+        )
+    return st.session_state.search_index
+
+def update_search_index(element_id):
+    """Promítne uloženou nebo smazanou konfiguraci elementu do vyhledávacího indexu"""
+    if st.session_state.search_index is not None:
+        st.session_state.search_index.update(
+            element_id,
+            st.session_state.configurations.get(element_id)
+        )
+
+def get_feeding_schedule():
+    """Vrátí rozpis krmení všech výběhů, po načtení nebo importu ho postaví znovu"""
+    if st.session_state.feeding_schedule is None:
+        st.session_state.feeding_schedule = FeedingSchedule(st.session_state.configurations)
+    return st.session_state.feeding_schedule
+
+@st.cache_resource(show_spinner=False)
+def get_project_store():
+    """Sdílené úložiště projektů (cesta z SVG_EDITOR_PROJECT_STORE)"""
+    return ProjectStore()
+
+def run_project_store(action):
+    """Provede operaci nad úložištěm projektů; chybu jen zaznamená, editor běží dál"""
+    try:
+        result = action(get_project_store())
+    except (sqlite3.Error, OSError) as e:
+        st.session_state.project_store_error = str(e)
+        return None
+    st.session_state.project_store_error = None
+    return result
+
+def commit_changes(changes, label):
+    """Zapíše změny konfigurací {id: nová konfigurace nebo None} jako krok žurnálu
     
-    .svg-container {
-        border: 2px solid #ddd;
-        border-radius: 10px;
-        padding: 20px;
-        background: white;
-        min-height: 400px;
-        overflow: auto;
-        max-height: 600px;
-    }
+    Konfigurace se nemění na místě – změna vždy předá nový slovník, starý
+    zůstává v historii pro krok zpět.
+    """
+    changed = st.session_state.journal.apply(st.session_state.configurations, changes, label)
+    sync_changed_elements(changed)
+    return changed
+
+def step_journal(step):
+    """Provede krok zpět nebo znovu (journal.undo / journal.redo) a promítne ho do editoru"""
+    changed = step(st.session_state.configurations)
+    sync_changed_elements(changed)
+    if st.session_state.selected_element in changed and 'temp_feeding_times' in st.session_state:
+        del st.session_state.temp_feeding_times
+
+def sync_changed_elements(changed):
+    """Promítne změněné konfigurace do příznaků elementů, indexů a úložiště projektu"""
+    if not changed:
+        return
+    configurations = st.session_state.configurations
+    for elem in st.session_state.svg_elements:
+        if elem['id'] in changed:
+            elem['configured'] = elem['id'] in configurations
     
-    .animal-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        margin: 0.5rem 0;
-        cursor: pointer;
-        transition: all 0.3s ease;
-    }
+    if len(changed) <= INCREMENTAL_SYNC_MAX_CHANGES:
+        for element_id in changed:
+            update_search_index(element_id)
+            if st.session_state.feeding_schedule is not None:
+                st.session_state.feeding_schedule.update(element_id, configurations.get(element_id))
+    else:
+        # Velkou změnu je levnější promítnout novým sestavením indexů při dalším použití
+        st.session_state.search_index = None
+        st.session_state.feeding_schedule = None
     
-    .animal-card:hover {
-        transform: scale(1.02);
-        box-shadow: 0 4px 12px rgba(0,0,0,0.2);
-    }
+    if st.session_state.svg_content is not None:
+        digest = get_map_digest()
+        values = {element_id: configurations.get(element_id) for element_id in changed}
+        run_project_store(lambda store: store.save_many(digest, values))
+
+@st.cache_resource(show_spinner=False)
+def get_preview_cache():
+    """Sdílené náhledy map podle otisku (stejná LRU jako pro dokumenty)"""
+    return SvgDocumentCache(max_entries=PREVIEW_CACHE_MAX_MAPS)
+
+def get_map_digest():
+    """Otisk aktuální mapy (spočítá se, pokud mapa nepřišla přes upload)"""
+    return st.session_state.svg_digest or svg_digest(st.session_state.svg_content.encode('utf-8'))
+
+@st.cache_resource(show_spinner=False)
+def get_geometry_cache():
+    """Sdílené geometrie map podle otisku (stejná LRU jako pro dokumenty)"""
+    return SvgDocumentCache(max_entries=GEOMETRY_CACHE_MAX_MAPS)
+
+def get_map_root():
+    """Strom aktuální mapy z cache dokumentů, None u proudově načtené mapy"""
+    document = get_document_cache().get(get_map_digest())
+    return document['root'] if document is not None else None
+
+def get_map_preview():
+    """Vrátí náhled aktuální mapy s cache dlaždic, při prvním použití ho postaví
+
+    U proudově načtené mapy to znamená naparsovat celý strom, proto je
+    u ní náhled ve výchozím stavu vypnutý.
+    """
+    digest = get_map_digest()
+    preview_cache = get_preview_cache()
+    preview = preview_cache.get(digest)
+    if preview is None:
+        geometry = get_map_geometry()
+        with st.spinner("Připravuji náhled mapy..."):
+            root = get_map_root()
+            if root is not None:
+                preview = MapPreview(root, geometry)
+            else:
+                preview = MapPreview.from_svg(st.session_state.svg_content, geometry)
+        preview_cache.put(digest, preview)
+    return preview
+
+def get_map_geometry():
+    """Vrátí geometrii aktuální mapy, u proudově načtené mapy ji spočítá bez stromu"""
+    digest = get_map_digest()
+    geometry_cache = get_geometry_cache()
+    geometry = geometry_cache.get(digest)
+    if geometry is None:
+        with st.spinner("Počítám geometrii mapy..."):
+            root = get_map_root()
+            if root is not None:
+                geometry = MapGeometry(root)
+            else:
+                geometry = stream_map_geometry(st.session_state.svg_content)
+        geometry_cache.put(digest, geometry)
+    return geometry
+
+def handle_map_click():
+    """Vybere element podle posledního kliknutí do mapy, pokud je nové
+
+    Hodnota komponenty je v session state už na začátku rerunu, takže
+    se výběr projeví v mapě i v konfiguraci bez dalšího rerunu.
+    """
+    click = st.session_state.get('svg_map')
+    if not click or click.get('nonce') == st.session_state.map_click_nonce:
+        return
+    st.session_state.map_click_nonce = click['nonce']
     
-    .animal-card-selected {
-        background: linear-gradient(135deg, #20b2aa 0%, #008b8b 100%);
-        border: 2px solid #ff6b35;
-    }
+    # Prohlížeč nemá dokument, na který by šla použít záplata – poslat celý
+    if click.get('resync'):
+        st.session_state.map_sent = None
+        return
     
-    .config-section {
-        background: #f8f9fa;
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        border-left: 4px solid #3498db;
-    }
+    element_id = resolve_click(click, get_map_geometry(), st.session_state.svg_element_ids)
+    if element_id:
+        st.session_state.selected_element = element_id
+
+def get_highlighted_document(base_svg, key):
+    """Vrátí zvýrazněný dokument; při stejném podkladu ho jen záplatuje podle změn konfigurací"""
+    document = st.session_state.highlighted_document
+    if document is None or document.key != key:
+        document = HighlightedDocument(base_svg, st.session_state.configurations, key=key)
+        st.session_state.highlighted_document = document
+    else:
+        document.update(st.session_state.configurations)
+    return document
+
+def render_map_component(document):
+    """Vykreslí klikací mapu a vrátí velikost odeslaných dat
     
-    .animal-item {
-        background: white;
-        padding: 10px;
-        margin: 5px 0;
-        border-radius: 5px;
-        border: 1px solid #ddd;
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-    }
+    Pokud prohlížeč už má stejný dokument o verzi starší nejvýš o jednu,
+    pošle se místo celého SVG jen záplata tříd zvýraznění.
+    """
+    sent = st.session_state.map_sent
+    if sent == (document.key, document.version):
+        payload = {'patch': [], 'patch_from': document.version}
+    elif sent == (document.key, document.version - 1):
+        payload = {'patch': document.last_patch, 'patch_from': sent[1]}
+    else:
+        payload = {'svg_content': document.text}
     
-    .progress-bar {
-        background: #ddd;
-        border-radius: 10px;
-        overflow: hidden;
-        height: 25px;
-    }
+    svg_map(
+        document.key,
+        document.version,
+        selected=st.session_state.selected_element,
+        key='svg_map',
+        **payload
+    )
+    st.session_state.map_sent = (document.key, document.version)
     
-    .progress-fill {
-        background: linear-gradient(90deg, #3498db, #27ae60);
-        height: 100%;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: white;
-        font-weight: bold;
-        transition: width 0.3s ease;
-    }
+    if 'svg_content' in payload:
+        return len(document.text.encode('utf-8'))
+    return len(json.dumps(payload['patch']))
+
+def render_bulk_configuration():
+    """Pravidlo pro výběr elementů, náhled počtu shod a hromadné uložení"""
+    if st.session_state.get('bulk_applied') is not None:
+        st.success(f"✅ Nakonfigurováno {st.session_state.bulk_applied} elementů")
+        st.session_state.bulk_applied = None
     
-    .element-button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        padding: 8px 12px;
-        border-radius: 6px;
-        cursor: pointer;
-        transition: all 0.3s ease;
-        width: 100%;
-        margin: 2px 0;
-        text-align: left;
+    elements = st.session_state.svg_elements
+    rule = {
+        'id_pattern': st.text_input("Id (regulární výraz):", placeholder="např. ^cesta_", key="bulk_id_pattern"),
+        'tags': st.multiselect("Tagy:", list(CLICKABLE_TAGS), key="bulk_tags"),
+        'parent': st.selectbox(
+            "Nadřazená skupina:",
+            [""] + sorted({elem['parent'] for elem in elements if elem.get('parent')}),
+            format_func=lambda x: x or "-- libovolná --",
+            key="bulk_parent"
+        ),
+        'fill': st.selectbox(
+            "Výplň:",
+            [""] + sorted({elem['fill'] for elem in elements if elem.get('fill')}),
+            format_func=lambda x: x or "-- libovolná --",
+            key="bulk_fill"
+        ),
     }
     
-    .element-button:hover {
-        transform: scale(1.02);
-        box-shadow: 0 2px 8px rgba(0,0,0,0.2);
-    }
+    geometry = None
+    if st.checkbox("Jen v oblasti mapy", key="bulk_use_region"):
+        geometry = get_map_geometry()
+        x, y, width, height = geometry.extent() or (0.0, 0.0, 0.0, 0.0)
+        col_r1, col_r2 = st.columns(2)
+        with col_r1:
+            min_x = st.number_input("Od x", value=float(x), key="bulk_min_x")
+            max_x = st.number_input("Do x", value=float(x + width), key="bulk_max_x")
+        with col_r2:
+            min_y = st.number_input("Od y", value=float(y), key="bulk_min_y")
+            max_y = st.number_input("Do y", value=float(y + height), key="bulk_max_y")
+        rule['region'] = (min_x, min_y, max_x, max_y)
     
-    .element-button-configured {
-        background: linear-gradient(135deg, #20b2aa 0%, #008b8b 100%);
-        border: 2px solid #ff6b35;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Session state inicializace
-if 'svg_content' not in st.session_state:
-    st.session_state.svg_content = None
-if 'configurations' not in st.session_state:
-    st.session_state.configurations = {}
-if 'svg_elements' not in st.session_state:
-    st.session_state.svg_elements = []
-if 'selected_element' not in st.session_state:
-    st.session_state.selected_element = None
-
-def parse_svg_elements(svg_content):
-    """Parsuje SVG a najde všechny klikací elementy"""
+    if not any(rule.values()):
+        st.caption("Zadejte aspoň jednu podmínku")
+        return
     try:
-        root = ET.fromstring(svg_content)
-        elements = []
-        
-        # Najít všechny relevantní elementy
-        for elem in root.iter():
-            tag_name = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
-            if tag_name in ['g', 'path', 'polygon', 'circle', 'ellipse', 'rect']:
-                element_id = elem.get('id', f"element_{len(elements)}")
-                if not elem.get('id'):
-                    elem.set('id', element_id)
-                
-                elements.append({
-                    'id': element_id,
-                    'tag': tag_name,
-                    'configured': element_id in st.session_state.configurations
-                })
-        
-        return elements
-    except Exception as e:
-        st.error(f"Chyba při parsování SVG: {e}")
-        return []
+        matched = match_elements(elements, rule, geometry)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    
+    # Náhled bez uložení
+    configured = sum(1 for element_id in matched if element_id in st.session_state.configurations)
+    st.caption(f"🔎 Pravidlu odpovídá {len(matched)} elementů, z toho {configured} už nakonfigurovaných")
+    
+    area_type = st.selectbox(
+        "Typ oblasti:",
+        list(AREA_TYPE_LABELS),
+        format_func=lambda x: AREA_TYPE_LABELS[x],
+        key="bulk_area_type"
+    )
+    name = st.text_input("Název (šablona):", placeholder="např. Cesta {n}", key="bulk_name",
+                         help="{id} se nahradí id elementu, {n} pořadím shody")
+    description = st.text_input("Popis:", key="bulk_description") if area_type != 'facility' else ''
+    template = template_fields(area_type, name, description)
+    if area_type == 'facility':
+        template['facilityType'] = st.selectbox(
+            "Typ služby:",
+            list(FACILITY_TYPE_LABELS),
+            format_func=lambda x: FACILITY_TYPE_LABELS[x],
+            key="bulk_facility_type"
+        )
+    overwrite = st.checkbox("Přepsat existující konfigurace", key="bulk_overwrite")
+    
+    updates = build_updates(matched, area_type, template, st.session_state.configurations, overwrite=overwrite)
+    if st.button(f"✅ Použít na {len(updates)} elementů", disabled=not updates, key="bulk_apply"):
+        # Jeden krok žurnálu – příznaky, indexy i úložiště se promítnou jen jednou
+        commit_changes(updates, f"Hromadná konfigurace ({len(updates)})")
+        st.session_state.bulk_applied = len(updates)
+        st.rerun()
+
+def render_merge(config_file, base_file):
+    """Sloučení nahraného exportu s aktuální konfigurací – souhrn, volba konfliktů a uložení"""
+    if st.session_state.get('merge_applied') is not None:
+        st.success(f"✅ Sloučeno {st.session_state.merge_applied} elementů")
+        st.session_state.merge_applied = None
+    
+    if config_file is None:
+        st.caption("Nahrajte export, který chcete sloučit s aktuální konfigurací")
+        return
+    if config_file.name.endswith('.jsonl'):
+        st.warning("Žurnál změn (JSONL) nelze slučovat, jen importovat")
+        return
+    
+    # Výsledek platí, dokud se nezmění soubory ani konfigurace (každá změna prochází žurnálem)
+    journal = st.session_state.journal
+    theirs_bytes = config_file.getvalue()
+    base_bytes = base_file.getvalue() if base_file is not None else None
+    key = (svg_digest(theirs_bytes), svg_digest(base_bytes) if base_bytes is not None else None, len(journal.log))
+    cached = st.session_state.get('merge_result')
+    if cached is not None and cached[0] == key and cached[1] is journal:
+        result = cached[2]
+    else:
+        try:
+            result = merge_configurations(
+                st.session_state.configurations,
+                theirs_bytes.decode('utf-8'),
+                base_bytes.decode('utf-8') if base_bytes is not None else None
+            )
+        except ValueError as e:
+            st.error(f"Chyba při slučování: {e}")
+            return
+        st.session_state.merge_result = (key, journal, result)
+    
+    changes, conflicts = result['changes'], result['conflicts']
+    st.caption(f"🔀 {len(changes)} změn k převzetí, {len(conflicts)} konfliktů, "
+               f"{result['unchanged']} shodných elementů")
+    
+    resolved = dict(changes)
+    if conflicts:
+        take_theirs = st.radio(
+            "Konflikty:", ["Ponechat moje", "Převzít jejich"], horizontal=True, key="merge_default"
+        ) == "Převzít jejich"
+        for n, conflict in enumerate(conflicts):
+            take = take_theirs
+            if n < MERGE_CONFLICTS_SHOWN:
+                fields = ", ".join(conflict['fields']) if conflict['fields'] is not None else "smazání"
+                # Klíč nese výchozí volbu, aby její změna přepnula i jednotlivé konflikty
+                take = st.checkbox(
+                    f"Převzít jejich: {conflict['id']} ({fields})",
+                    value=take_theirs,
+                    key=f"merge_take_{take_theirs}_{conflict['id']}"
+                )
+            resolved[conflict['id']] = resolve_conflict(conflict, take)
+        if len(conflicts) > MERGE_CONFLICTS_SHOWN:
+            st.caption(f"Zbylých {len(conflicts) - MERGE_CONFLICTS_SHOWN} konfliktů se vyřeší výchozí volbou")
+    
+    if st.button("🔀 Sloučit", disabled=not resolved, key="merge_apply"):
+        # Jeden krok žurnálu – sloučení jde vrátit tlačítkem Zpět
+        changed = commit_changes(resolved, f"Sloučení konfigurace ({len(resolved)})")
+        st.session_state.merge_applied = len(changed)
+        st.session_state.merge_result = None
+        st.rerun()
 
 def get_animal_presets():
     """Přednastavené druhy zvířat"""
@@ -175,50 +586,70 @@ def get_animal_presets():
         '🐙': 'Chobotnice'
     }
 
-def render_svg_with_highlights(svg_content, configurations):
-    """Renderuje SVG s vizuálním zvýrazněním nakonfigurovaných elementů"""
-    try:
-        # Přidat CSS styling do SVG
-        style_tag = """
-        <style>
-            .configured-element { 
-                stroke: #27ae60 !important; 
-                stroke-width: 3 !important; 
-                opacity: 0.8;
-            }
-            .enclosure-pedestrian { fill: #90EE90 !important; }
-            .enclosure-safari { fill: #FFD700 !important; }
-            .path-pedestrian { fill: #DDA0DD !important; }
-            .path-safari { fill: #F0E68C !important; }
-            .water { fill: #87CEEB !important; }
-            .restricted { fill: #FFB6C1 !important; }
-            .facility { fill: #FFA500 !important; }
-        </style>
-        """
-        
-        # Vložit styling do SVG
-        if '<svg' in svg_content and '<defs>' in svg_content:
-            svg_content = svg_content.replace('<defs>', f'<defs>{style_tag}')
-        elif '<svg' in svg_content:
-            # Najít první výskyt <svg> a vložit styl za něj
-            svg_start = svg_content.find('<svg')
-            svg_end = svg_content.find('>', svg_start)
-            if svg_end != -1:
-                svg_content = svg_content[:svg_end+1] + style_tag + svg_content[svg_end+1:]
-        
-        # Přidat třídy k nakonfigurovaným elementům
-        for element_id, config in configurations.items():
-            if config.get('areaType'):
-                pattern = f'id="{element_id}"'
-                replacement = f'id="{element_id}" class="configured-element {config["areaType"]}"'
-                svg_content = svg_content.replace(pattern, replacement)
-        
-        return svg_content
-    except Exception as e:
-        st.error(f"Chyba při renderování SVG: {e}")
-        return svg_content
+@st.cache_resource(show_spinner=False)
+def get_metrics_file(path):
+    """Sdílený soubor s metrikami (všechna sezení zapisující do stejné cesty)"""
+    return MetricsFile(path)
+
+def record_rerun_metrics(metrics):
+    """Uloží měření dokončeného rerunu do historie a případně do souboru s metrikami"""
+    metrics.finish()
+    st.session_state.rerun_metrics.append(metrics)
+    
+    # Soubor zapisuje vlákno na pozadí, rerun na disk nečeká – zobrazí se chyba posledního zápisu
+    if st.session_state.metrics_to_file:
+        try:
+            metrics_file = get_metrics_file(st.session_state.metrics_file)
+            metrics_file.append(metrics)
+            st.session_state.metrics_error = metrics_file.error
+        except OSError as e:
+            st.session_state.metrics_error = str(e)
+
+def paginate(items, key, size_label):
+    """Výběr velikosti a čísla stránky; vrátí (položky stránky, index první položky, stránka, počet stránek)
+
+    Stav drží widgety v session state pod klíči `{key}_page_size` a `{key}_page`.
+    """
+    page_key = f"{key}_page"
+    page_col1, page_col2 = st.columns(2)
+    with page_col1:
+        page_size = st.selectbox(
+            size_label,
+            GRID_PAGE_SIZES,
+            index=GRID_PAGE_SIZES.index(GRID_DEFAULT_PAGE_SIZE),
+            key=f"{key}_page_size"
+        )
+    
+    page_count = max(1, (len(items) + page_size - 1) // page_size)
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+    
+    with page_col2:
+        page = st.number_input(
+            "Stránka:",
+            min_value=1,
+            step=1,
+            key=page_key
+        )
+        page = min(page, page_count)
+    
+    page_start = (page - 1) * page_size
+    return items[page_start:page_start + page_size], page_start, page, page_count
 
 def main():
+    setup_page()
+    init_session_state()
+    
+    st.session_state.rerun_count += 1
+    metrics = RerunMetrics(st.session_state.rerun_count, session=st.session_state.metrics_session)
+    try:
+        render_editor(metrics)
+    finally:
+        # Zaznamenat i reruny ukončené přes st.rerun() / st.stop()
+        record_rerun_metrics(metrics)
+
+def render_editor(metrics):
+    metrics.begin('sidebar')
     st.markdown('<h1 class="main-header">🦁 SVG Zoo Editor 🦒</h1>', unsafe_allow_html=True)
     
     # Sidebar pro upload a základní ovládání
@@ -233,8 +664,63 @@ def main():
         )
         
         if uploaded_file is not None:
-            st.session_state.svg_content = uploaded_file.read().decode('utf-8')
-            st.session_state.svg_elements = parse_svg_elements(st.session_state.svg_content)
+            metrics.begin('upload')
+            data = uploaded_file.getvalue()
+            digest = svg_digest(data)
+            
+            # Při rerunu se stejným souborem stačí porovnat otisk
+            if digest != st.session_state.svg_digest:
+                document_cache = get_document_cache()
+                document = document_cache.get(digest)
+                if document is None:
+                    # Seznam elementů se u velkých map plní průběžně během parsování
+                    progress_placeholder = st.empty()
+                    try:
+                        document = load_svg_document(
+                            data,
+                            digest=digest,
+                            progress=lambda count: progress_placeholder.caption(f"⏳ Načteno {count} elementů...")
+                        )
+                    except SvgEngineError as e:
+                        st.error(str(e))
+                        st.stop()
+                    progress_placeholder.empty()
+                    document_cache.put(digest, document)
+                
+                if document['error']:
+                    st.error(f"Chyba při parsování SVG: {document['error']}")
+                
+                st.session_state.svg_digest = digest
+                st.session_state.svg_content = document['svg_content']
+                element_ids = frozenset(elem['id'] for elem in document['elements'])
+                
+                # Uložený projekt mapy má přednost, jinak se rozpracované konfigurace převezmou
+                # jen pro elementy, které nová mapa má – ostatní až na přání uživatele
+                stored = run_project_store(lambda store: store.load(digest))
+                st.session_state.carryover_unmatched = {}
+                if stored:
+                    st.session_state.configurations = stored
+                elif st.session_state.configurations:
+                    configurations = {
+                        element_id: config for element_id, config in st.session_state.configurations.items()
+                        if element_id in element_ids
+                    }
+                    st.session_state.carryover_unmatched = {
+                        element_id: config for element_id, config in st.session_state.configurations.items()
+                        if element_id not in element_ids
+                    }
+                    st.session_state.configurations = configurations
+                    if stored is not None and configurations:
+                        run_project_store(lambda store: store.replace(digest, configurations))
+                st.session_state.project_restored = len(stored or ())
+                st.session_state.journal.reset(st.session_state.configurations)
+                st.session_state.svg_elements = [
+                    dict(elem, configured=elem['id'] in st.session_state.configurations)
+                    for elem in document['elements']
+                ]
+                st.session_state.svg_element_ids = element_ids
+                st.session_state.search_index = None
+                st.session_state.feeding_schedule = None
             
             # Test zobrazení SVG
             with st.expander("🔍 Test zobrazení SVG"):
@@ -261,6 +747,20 @@ def main():
                     st.info(f"📏 Velikost: {size_mb:.2f} MB")
             
             st.success("✅ SVG soubor načten!")
+            if st.session_state.get('project_restored'):
+                st.info(f"💾 Obnoveno {st.session_state.project_restored} konfigurací z uloženého projektu")
+            unmatched = st.session_state.get('carryover_unmatched')
+            if unmatched:
+                st.warning(f"{len(unmatched)} konfigurací z předchozí mapy nemá v této mapě element se stejným id")
+                if st.button(f"📥 Přesto převzít {len(unmatched)} konfigurací"):
+                    commit_changes(unmatched, f"Převzetí konfigurací z předchozí mapy ({len(unmatched)})")
+                    st.session_state.carryover_unmatched = {}
+                    st.rerun()
+        
+        if st.session_state.project_store_error:
+            st.warning(f"Automatické ukládání selhalo: {st.session_state.project_store_error}")
+        
+        metrics.begin('sidebar')
         
         # Progress bar
         if st.session_state.svg_elements:
@@ -277,25 +777,75 @@ def main():
             </div>
             """, unsafe_allow_html=True)
         
+        # Zpět / znovu
+        journal = st.session_state.journal
+        col_u1, col_u2 = st.columns(2)
+        with col_u1:
+            if st.button("↩️ Zpět", disabled=journal.undo_label is None, help=journal.undo_label,
+                         use_container_width=True):
+                step_journal(journal.undo)
+                st.rerun()
+        with col_u2:
+            if st.button("↪️ Znovu", disabled=journal.redo_label is None, help=journal.redo_label,
+                         use_container_width=True):
+                step_journal(journal.redo)
+                st.rerun()
+        
+        # Hromadná konfigurace podle pravidla
+        if st.session_state.svg_elements:
+            with st.expander("🧰 Hromadná konfigurace"):
+                render_bulk_configuration()
+        
         # Import/Export konfigurace
         st.markdown("---")
         st.header("💾 Import/Export")
         
         # Import konfigurace
+        import_mode = st.radio("Import:", ["Nahradit", "Sloučit"], horizontal=True, key="import_mode",
+                               help="Sloučit převezme změny z exportu jiného sezení a zachová ty vaše")
         config_file = st.file_uploader(
             "Import konfigurace:",
-            type=['json'],
-            help="Nahrajte dříve uložený JSON s konfigurací"
+            type=['json', 'jsonl'],
+            help="Nahrajte dříve uložený JSON s konfigurací, nebo žurnál změn (JSONL) – "
+                 "ten obnoví i historii kroků"
         )
         
-        if config_file is not None:
+        # Stejný soubor zůstává v uploaderu i v dalších rerunech, importuje se jen jednou
+        config_bytes = config_file.getvalue() if config_file is not None else None
+        if import_mode == "Sloučit":
+            base_file = st.file_uploader(
+                "Společný základ (nepovinný):",
+                type=['json'],
+                key="merge_base_file",
+                help="Export, ze kterého vyšly obě verze – umožní převzít i smazání a rozpoznat konflikty"
+            )
+            render_merge(config_file, base_file)
+            # Po přepnutí zpět na Nahradit se už sloučený soubor sám neimportuje
+            if config_bytes is not None:
+                st.session_state.config_import_digest = svg_digest(config_bytes)
+        elif config_bytes is not None and svg_digest(config_bytes) != st.session_state.config_import_digest:
+            st.session_state.config_import_digest = svg_digest(config_bytes)
             try:
-                config_data = json.loads(config_file.read().decode('utf-8'))
-                if 'configurations' in config_data:
-                    st.session_state.configurations = config_data['configurations']
+                if config_file.name.endswith('.jsonl'):
+                    journal, configurations = ConfigJournal.replay(config_bytes.decode('utf-8').splitlines())
+                else:
+                    config_data = json.loads(config_bytes.decode('utf-8'))
+                    configurations = config_data.get('configurations')
+                    journal = None
+                if configurations is not None:
+                    st.session_state.configurations = configurations
+                    if journal is None:
+                        journal = ConfigJournal()
+                        journal.reset(configurations)
+                    st.session_state.journal = journal
+                    if st.session_state.svg_content is not None:
+                        digest = get_map_digest()
+                        run_project_store(lambda store: store.replace(digest, configurations))
                     # Aktualizovat označení elementů
                     for elem in st.session_state.svg_elements:
                         elem['configured'] = elem['id'] in st.session_state.configurations
+                    st.session_state.search_index = None
+                    st.session_state.feeding_schedule = None
                     st.success("✅ Konfigurace importována!")
                     st.rerun()
             except Exception as e:
@@ -343,19 +893,60 @@ def main():
         
         # Zobrazení SVG s lepším renderováním
         if st.session_state.svg_content:
-            highlighted_svg = render_svg_with_highlights(
-                st.session_state.svg_content, 
-                st.session_state.configurations
+            # Úroveň detailu – velké mapy jako přehled nebo jeden výřez
+            metrics.begin('preview')
+            # Proudově načtená mapa nemá strom, náhled by ji celou naparsoval
+            use_preview = st.checkbox(
+                "Zjednodušený náhled (přehled a výřezy)",
+                value=len(st.session_state.svg_content) > PREVIEW_THRESHOLD_BYTES and get_map_root() is not None,
+                help="Do prohlížeče se pošle jen přehled bez drobných tvarů nebo vybraný výřez mapy. "
+                     "U velmi velké mapy načtené proudově je příprava náhledu náročná na paměť."
             )
+            preview_svg = st.session_state.svg_content
+            if use_preview:
+                col_zoom, col_column, col_row = st.columns(3)
+                with col_zoom:
+                    zoom = st.select_slider(
+                        "Přiblížení",
+                        options=list(range(MAX_ZOOM + 1)),
+                        format_func=lambda level: "Přehled" if level == 0 else f"{2 ** level}×"
+                    )
+                column = row = 1
+                if zoom:
+                    # Každá úroveň má vlastní posuvníky (různý počet dlaždic)
+                    tiles = 2 ** zoom
+                    with col_column:
+                        column = st.slider("Výřez – sloupec", 1, tiles, key=f"preview_column_{zoom}")
+                    with col_row:
+                        row = st.slider("Výřez – řádek", 1, tiles, key=f"preview_row_{zoom}")
+                preview_svg = get_map_preview().render(zoom, column - 1, row - 1)
+            
+            metrics.begin('render_highlights')
+            base_key = get_map_digest()
+            if use_preview:
+                base_key += f":{zoom}:{column}:{row}"
+            highlighted_document = get_highlighted_document(preview_svg, base_key)
+            
+            metrics.begin('map_display')
             
             # Způsob zobrazení SVG
             display_method = st.radio(
                 "Způsob zobrazení:",
-                ["HTML", "Components"],
+                ["Klikací mapa", "HTML", "Components"],
                 horizontal=True,
-                help="Zkuste různé způsoby pokud se mapa nezobrazuje správně"
+                help="Klikací mapa vybírá elementy kliknutím, ostatní způsoby zkuste, "
+                     "pokud se mapa nezobrazuje správně"
             )
             
+            if display_method == "Klikací mapa":
+                handle_map_click()
+                metrics.add_bytes(render_map_component(highlighted_document))
+            else:
+                # Komponenta se při návratu připojí znovu a potřebuje celý dokument
+                st.session_state.map_sent = None
+                highlighted_svg = highlighted_document.text
+                metrics.add_bytes(highlighted_svg)
+                
             if display_method == "HTML":
                 # HTML wrapper s lepším stylováním
                 st.markdown(f"""
@@ -381,34 +972,74 @@ def main():
                 
                 # Zobrazit začátek SVG
                 st.code(st.session_state.svg_content[:500] + "...", language="xml")
+                
+                # Měření posledních rerunů (aktuální rerun ještě běží)
+                st.markdown(f"**⏱️ Posledních {RERUN_HISTORY_SIZE} rerunů (časy v ms):**")
+                if st.session_state.rerun_metrics:
+                    st.dataframe(
+                        [m.as_dict() for m in reversed(st.session_state.rerun_metrics)],
+                        use_container_width=True
+                    )
+                
+                # Nastavení se drží mimo klíče widgetů – ty Streamlit zahodí v rerunu, kde se nevykreslí,
+                # widget se z nich jen obnoví
+                for setting in ('metrics_to_file', 'metrics_file'):
+                    if f'{setting}_input' not in st.session_state:
+                        st.session_state[f'{setting}_input'] = st.session_state[setting]
+                st.session_state.metrics_to_file = st.checkbox(
+                    "Zapisovat metriky do souboru (formát Prometheus)",
+                    key="metrics_to_file_input"
+                )
+                st.session_state.metrics_file = st.text_input("Soubor s metrikami:", key="metrics_file_input")
+                if st.session_state.metrics_error:
+                    st.error(f"Zápis metrik selhal: {st.session_state.metrics_error}")
         
         # Seznam elementů pro výběr
+        metrics.begin('element_grid')
         st.subheader("📋 Elementy na mapě")
         
         if st.session_state.svg_elements:
-            # Filtrování
+            # Filtrování (stav filtru drží widgety v session state napříč stránkami)
             filter_col1, filter_col2 = st.columns(2)
             with filter_col1:
-                show_all = st.checkbox("Zobrazit všechny elementy", value=True)
+                show_all = st.checkbox("Zobrazit všechny elementy", value=True, key="grid_show_all")
+                search_prefix = st.checkbox("Hledat jen začátky slov", value=False, key="grid_search_prefix")
             with filter_col2:
-                search_term = st.text_input("🔍 Hledat element:", placeholder="Zadejte název...")
+                search_term = st.text_input(
+                    "🔍 Hledat element:",
+                    placeholder="ID, název, zvíře...",
+                    key="grid_search"
+                )
             
             elements_to_show = st.session_state.svg_elements
+            if search_term:
+                elements_to_show = [
+                    elements_to_show[position]
+                    for position in get_search_index().search(search_term, prefix=search_prefix)
+                ]
+            
             if not show_all:
-                elements_to_show = [e for e in st.session_state.svg_elements if not e['configured']]
+                elements_to_show = [e for e in elements_to_show if not e['configured']]
             
-            if search_term:
-                elements_to_show = [e for e in elements_to_show if search_term.lower() in e['id'].lower()]
+            # Při změně filtru začít od první stránky
+            if st.session_state.get('grid_filter') != (show_all, search_term, search_prefix):
+                st.session_state.grid_filter = (show_all, search_term, search_prefix)
+                st.session_state.grid_page = 1
             
-            # Grid pro elementy s lepším zobrazením
+            # Grid pro elementy - vykresluje se jen aktuální stránka
             if elements_to_show:
-                st.markdown(f"**Zobrazeno {len(elements_to_show)} elementů:**")
+                page_elements, page_start, page, page_count = paginate(elements_to_show, "grid", "Elementů na stránku:")
+                st.markdown(
+                    f"**Zobrazeno {page_start + 1}–{page_start + len(page_elements)} "
+                    f"z {len(elements_to_show)} elementů (stránka {page}/{page_count}):**"
+                )
                 
                 # Rozdělení do sloupců
                 num_cols = 3
                 cols = st.columns(num_cols)
+
                 
-                for i, element in enumerate(elements_to_show):
+                for i, element in enumerate(page_elements):
                     with cols[i % num_cols]:
                         config = st.session_state.configurations.get(element['id'], {})
                         
@@ -423,6 +1054,7 @@ def main():
                         if len(button_text) > 25:
                             button_text = button_text[:22] + "..."
                         
+                        metrics.count_widgets()
                         if st.button(
                             button_text,
                             key=f"select_{element['id']}",
@@ -440,6 +1072,7 @@ def main():
             else:
                 st.info("Žádné elementy nevyhovují filtru")
     
+    metrics.begin('config_panel')
     with col2:
         st.subheader("⚙️ Konfigurace")
         
@@ -449,23 +1082,40 @@ def main():
             
             st.info(f"🎯 Konfigurujete: **{element_id}**")
             
+            # Rozměry a nakonfigurované okolí elementu – geometrie mapy se počítá až na vyžádání
+            geometry_info = None
+            if st.checkbox("📐 Rozměry a okolí", key="show_geometry"):
+                geometry = get_map_geometry()
+                geometry_info = geometry.info(element_id)
+            if geometry_info:
+                min_x, min_y, max_x, max_y = geometry_info['bbox']
+                centroid_x, centroid_y = geometry_info['centroid']
+                st.caption(
+                    f"📐 {max_x - min_x:.0f} × {max_y - min_y:.0f}, plocha {geometry_info['area']:.0f}, "
+                    f"těžiště ({centroid_x:.0f}, {centroid_y:.0f})"
+                )
+                distance = max(max_x - min_x, max_y - min_y) * NEARBY_DISTANCE_FACTOR
+                nearby = [
+                    other for other in geometry.elements_near(element_id, distance)
+                    if other in st.session_state.configurations
+                ][:NEARBY_LIMIT]
+                if nearby:
+                    names = []
+                    for other in nearby:
+                        other_config = st.session_state.configurations[other]
+                        names.append(
+                            other_config.get('enclosureName') or other_config.get('facilityName')
+                            or other_config.get('areaName') or other
+                        )
+                    st.caption("📍 V okolí: " + ", ".join(names))
+            
             # Typ oblasti
+            area_types = [""] + list(AREA_TYPE_LABELS)
             area_type = st.selectbox(
                 "🏷️ Typ oblasti:",
-                ["", "enclosure-pedestrian", "enclosure-safari", "path-pedestrian", 
-                 "path-safari", "water", "restricted", "facility"],
-                format_func=lambda x: {
-                    "": "-- Vyberte typ --",
-                    "enclosure-pedestrian": "🚶 Výběh - pěší část",
-                    "enclosure-safari": "🚗 Výběh - safari",
-                    "path-pedestrian": "🛤️ Cesta - pěší",
-                    "path-safari": "🛣️ Cesta - safari", 
-                    "water": "💧 Vodní plocha",
-                    "restricted": "🚫 Zázemí zoo",
-                    "facility": "🏢 Služba/budova"
-                }.get(x, x),
-                index=["", "enclosure-pedestrian", "enclosure-safari", "path-pedestrian", 
-                       "path-safari", "water", "restricted", "facility"].index(config.get('areaType', '')) if config.get('areaType') in ["", "enclosure-pedestrian", "enclosure-safari", "path-pedestrian", "path-safari", "water", "restricted", "facility"] else 0
+                area_types,
+                format_func=lambda x: AREA_TYPE_LABELS.get(x, "-- Vyberte typ --"),
+                index=area_types.index(config.get('areaType', '')) if config.get('areaType') in area_types else 0
             )
             
             # Konfigurace výběhů
@@ -484,10 +1134,11 @@ def main():
                     height=80
                 )
                 
+                # Importovaná nebo sloučená konfigurace může mít neznámou oblast
                 zone = st.selectbox(
                     "🌍 Geografická oblast:",
-                    ["Afrika", "Asie", "Evropa", "Amerika", "Austrálie", "Antarktida", "Světové"],
-                    index=["Afrika", "Asie", "Evropa", "Amerika", "Austrálie", "Antarktida", "Světové"].index(config.get('zone', 'Afrika'))
+                    ZONES,
+                    index=ZONES.index(config['zone']) if config.get('zone') in ZONES else 0
                 )
                 
                 # Časy krmení
@@ -496,11 +1147,12 @@ def main():
                 
                 # Dynamické přidávání časů
                 if 'temp_feeding_times' not in st.session_state:
-                    st.session_state.temp_feeding_times = feeding_times if feeding_times else ['']
+                    st.session_state.temp_feeding_times = list(feeding_times) or ['']
                 
                 for i in range(len(st.session_state.temp_feeding_times)):
                     col_time, col_remove = st.columns([4, 1])
                     with col_time:
+                        metrics.count_widgets()
                         time_val = st.time_input(
                             f"Čas {i+1}:", 
                             value=None,
@@ -512,6 +1164,7 @@ def main():
                             st.session_state.temp_feeding_times[i] = time_val.strftime('%H:%M')
                     with col_remove:
                         if len(st.session_state.temp_feeding_times) > 1:
+                            metrics.count_widgets()
                             if st.button("🗑️", key=f"remove_time_{element_id}_{i}"):
                                 st.session_state.temp_feeding_times.pop(i)
                                 st.rerun()
@@ -533,10 +1186,12 @@ def main():
                         with col_a1:
                             st.markdown(f"{animal['emoji']} **{animal['name']}**")
                         with col_a2:
+                            metrics.count_widgets()
                             if st.button("🗑️", key=f"remove_{element_id}_{i}", help="Odstranit"):
-                                current_animals.pop(i)
-                                config['animals'] = current_animals
-                                st.session_state.configurations[element_id] = config
+                                commit_changes(
+                                    {element_id: dict(config, animals=current_animals[:i] + current_animals[i + 1:])},
+                                    f"Odebrání zvířete {animal['name']}"
+                                )
                                 st.rerun()
                 
                 # Přidání nového zvířete - rychlý výběr
@@ -550,18 +1205,17 @@ def main():
                     cols = st.columns(num_cols)
                     for col_idx, (emoji, name) in enumerate(preset_items[row:row+num_cols]):
                         with cols[col_idx]:
+                            metrics.count_widgets()
                             if st.button(f"{emoji}", key=f"preset_{element_id}_{row}_{col_idx}", help=name):
-                                if 'animals' not in config:
-                                    config['animals'] = []
+                                animals = config.get('animals', [])
                                 
                                 # Kontrola duplikátů
-                                if not any(a['name'] == name for a in config['animals']):
-                                    config['animals'].append({
-                                        'name': name,
-                                        'emoji': emoji,
-                                        'id': len(config['animals'])
-                                    })
-                                    st.session_state.configurations[element_id] = config
+                                if not any(a['name'] == name for a in animals):
+                                    animal = {'name': name, 'emoji': emoji, 'id': len(animals)}
+                                    commit_changes(
+                                        {element_id: dict(config, animals=animals + [animal])},
+                                        f"Přidání zvířete {name}"
+                                    )
                                     st.rerun()
                                 else:
                                     st.error("Toto zvíře už je ve výběhu!")
@@ -576,16 +1230,14 @@ def main():
                 with col_n3:
                     if st.button("➕ Přidat", key=f"add_{element_id}"):
                         if new_animal_name:
-                            if 'animals' not in config:
-                                config['animals'] = []
+                            animals = config.get('animals', [])
                             
-                            if not any(a['name'] == new_animal_name for a in config['animals']):
-                                config['animals'].append({
-                                    'name': new_animal_name,
-                                    'emoji': new_animal_emoji,
-                                    'id': len(config['animals'])
-                                })
-                                st.session_state.configurations[element_id] = config
+                            if not any(a['name'] == new_animal_name for a in animals):
+                                animal = {'name': new_animal_name, 'emoji': new_animal_emoji, 'id': len(animals)}
+                                commit_changes(
+                                    {element_id: dict(config, animals=animals + [animal])},
+                                    f"Přidání zvířete {new_animal_name}"
+                                )
                                 st.rerun()
                             else:
                                 st.error("Toto zvíře už je ve výběhu!")
@@ -596,16 +1248,9 @@ def main():
                 
                 facility_type = st.selectbox(
                     "Typ služby:",
-                    ["WC", "Restaurant", "Shop", "Info", "FirstAid", "Parking"],
-                    format_func=lambda x: {
-                        "WC": "🚻 Toalety",
-                        "Restaurant": "🍽️ Restaurace", 
-                        "Shop": "🛍️ Obchod",
-                        "Info": "ℹ️ Informace",
-                        "FirstAid": "🏥 První pomoc",
-                        "Parking": "🅿️ Parkování"
-                    }.get(x, x),
-                    index=["WC", "Restaurant", "Shop", "Info", "FirstAid", "Parking"].index(config.get('facilityType', 'WC'))
+                    list(FACILITY_TYPE_LABELS),
+                    format_func=lambda x: FACILITY_TYPE_LABELS.get(x, x),
+                    index=list(FACILITY_TYPE_LABELS).index(config.get('facilityType', 'WC'))
                 )
                 
                 facility_name = st.text_input(
@@ -659,12 +1304,7 @@ def main():
                         'areaDescription': area_description
                     })
                 
-                st.session_state.configurations[element_id] = new_config
-                
-                # Označit element jako nakonfigurovaný
-                for elem in st.session_state.svg_elements:
-                    if elem['id'] == element_id:
-                        elem['configured'] = True
+                commit_changes({element_id: new_config}, f"Uložení {element_id}")
                 
                 # Vyčistit temp feeding times
                 if 'temp_feeding_times' in st.session_state:
@@ -676,12 +1316,7 @@ def main():
             # Smazání konfigurace
             if element_id in st.session_state.configurations:
                 if st.button("🗑️ Smazat konfiguraci", type="secondary"):
-                    del st.session_state.configurations[element_id]
-                    
-                    # Označit jako nenakonfigurovaný
-                    for elem in st.session_state.svg_elements:
-                        if elem['id'] == element_id:
-                            elem['configured'] = False
+                    commit_changes({element_id: None}, f"Smazání {element_id}")
                     
                     # Vyčistit temp feeding times
                     if 'temp_feeding_times' in st.session_state:
@@ -696,18 +1331,28 @@ def main():
             # Přehled nakonfigurovaných elementů
             if st.session_state.configurations:
                 st.markdown("### 📊 Nakonfigurované elementy")
-                for element_id, config in st.session_state.configurations.items():
+                # Po hromadné konfiguraci jsou jich tisíce – vykresluje se jen aktuální stránka
+                configured = list(st.session_state.configurations.items())
+                page_items, page_start, page, page_count = paginate(configured, "overview", "Položek na stránku:")
+                if page_count > 1:
+                    st.caption(
+                        f"Zobrazeno {page_start + 1}–{page_start + len(page_items)} "
+                        f"z {len(configured)} (stránka {page}/{page_count})"
+                    )
+                for element_id, config in page_items:
                     icon = get_type_icon(config.get('areaType', ''))
                     name = (config.get('enclosureName') or 
                            config.get('facilityName') or 
                            config.get('areaName') or 
                            element_id)
                     
+                    metrics.count_widgets()
                     if st.button(f"{icon} {name}", key=f"overview_{element_id}"):
                         st.session_state.selected_element = element_id
                         st.rerun()
     
     # Export sekce
+    metrics.begin('export')
     if st.session_state.configurations:
         st.markdown("---")
         st.subheader("📤 Export")
@@ -715,24 +1360,97 @@ def main():
         col_e1, col_e2 = st.columns(2)
         
         with col_e1:
+            event_delegation = st.checkbox(
+                "Kompaktní export (data v jednom bloku)",
+                value=True,
+                help="Konfigurace se vloží jednou jako JSON a kliknutí obsluhuje jediný handler. "
+                     "Bez zaškrtnutí dostane každý element vlastní atributy data-* a onclick."
+            )
+            optimize = st.checkbox(
+                "Optimalizovat geometrii",
+                value=False,
+                help="Zaokrouhlí souřadnice, zkrátí data cest a vynechá výchozí atributy a mezery."
+            )
+            precision = st.number_input(
+                "Přesnost souřadnic (desetinná místa)",
+                min_value=0,
+                max_value=6,
+                value=2,
+                disabled=not optimize
+            )
+            deduplicate = st.checkbox(
+                "Sloučit opakované tvary",
+                value=False,
+                help="Stejné tvary (stromy, lavičky, ikony) se uloží jednou jako <symbol> "
+                     "a na mapě se použijí přes <use>. Nakonfigurované prvky zůstávají beze změny."
+            )
+            routes = st.checkbox(
+                "Plánovač tras",
+                value=False,
+                disabled=not event_delegation,
+                help="Propojí nakonfigurované cesty s výběhy a službami a vloží do exportu "
+                     "předpočítané nejkratší trasy. Vyžaduje kompaktní export."
+            )
+            export_format = st.selectbox(
+                "Formát souboru",
+                options=available_formats(),
+                format_func=lambda name: EXPORT_FORMATS[name]['label'],
+                help="Předkomprimované varianty může webový server posílat bez vlastní komprese."
+            )
             if st.button("📥 Stáhnout upravenou SVG", type="primary"):
                 try:
                     # Generovat interaktivní SVG
-                    export_svg = generate_interactive_svg(
+                    export_root = build_interactive_tree(
                         st.session_state.svg_content, 
-                        st.session_state.configurations
+                        st.session_state.configurations,
+                        event_delegation=event_delegation,
+                        routes=routes,
+                        geometry=get_map_geometry() if routes and event_delegation else None
                     )
+                    if deduplicate:
+                        dedup_report = deduplicate_shapes(
+                            export_root, int(precision) if optimize else DEDUP_DEFAULT_PRECISION
+                        )
+                        st.caption(
+                            f"Sloučeno {dedup_report['instances']} tvarů do {dedup_report['symbols']} symbolů "
+                            f"(odhadem −{dedup_report['saved_bytes'] / 1024:.1f} kB)"
+                        )
+                    if optimize:
+                        report = optimize_tree(export_root, int(precision))
+                        st.caption(
+                            f"Optimalizace ušetřila {report['saved_bytes'] / 1024:.1f} kB "
+                            f"({report['paths']} cest, {report['dropped_attributes']} výchozích atributů)"
+                        )
+                    export_buffer = io.BytesIO()
+                    written = write_svg_variants(export_root, [(export_format, export_buffer)])
+                    if export_format != 'svg':
+                        st.caption(
+                            f"Komprese: {written['raw_bytes'] / 1024:.1f} kB → "
+                            f"{written['written'][export_format] / 1024:.1f} kB"
+                        )
                     
                     st.download_button(
                         label="💾 Stáhnout SVG soubor",
-                        data=export_svg,
-                        file_name=f"zoo_mapa_interaktivni_{datetime.now().strftime('%Y%m%d_%H%M')}.svg",
-                        mime="image/svg+xml"
+                        data=export_buffer.getvalue(),
+                        file_name=(
+                            f"zoo_mapa_interaktivni_{datetime.now().strftime('%Y%m%d_%H%M')}"
+                            f"{EXPORT_FORMATS[export_format]['suffix']}"
+                        ),
+                        mime=EXPORT_FORMATS[export_format]['mime']
                     )
                 except Exception as e:
                     st.error(f"Chyba při exportu: {e}")
         
         with col_e2:
+            if st.button("📜 Export žurnálu změn"):
+                st.download_button(
+                    label="💾 Stáhnout žurnál (JSONL)",
+                    data=''.join(st.session_state.journal.log_lines()),
+                    file_name=f"zoo_zurnal_{datetime.now().strftime('%Y%m%d_%H%M')}.jsonl",
+                    mime="application/x-ndjson",
+                    help="Z žurnálu lze po importu obnovit konfigurace i historii kroků"
+                )
+            
             if st.button("📋 Export konfigurace JSON"):
                 config_data = {
                     'timestamp': datetime.now().isoformat(),
@@ -768,6 +1486,33 @@ def main():
         with col_s4:
             total_animals = sum([len(c.get('animals', [])) for c in st.session_state.configurations.values()])
             st.metric("🦁 Zvířata", total_animals)
+        
+        # Rozpis krmení
+        schedule = get_feeding_schedule()
+        if len(schedule):
+            st.markdown("### 🍖 Krmení")
+            now = datetime.now()
+            upcoming = schedule.upcoming(now.hour * 60 + now.minute)
+            
+            def enclosure_name(element_id):
+                return st.session_state.configurations.get(element_id, {}).get('enclosureName') or element_id
+            
+            if upcoming:
+                st.markdown(f"**V příštích {FEEDING_WINDOW_MINUTES} minutách:**")
+                for minute, element_id in upcoming:
+                    st.markdown(f"🕐 {format_minute(minute)} – {enclosure_name(element_id)}")
+            else:
+                st.caption(f"V příštích {FEEDING_WINDOW_MINUTES} minutách žádné krmení není")
+            
+            with st.expander(f"📅 Celý den ({len(schedule)} krmení)"):
+                st.dataframe(
+                    [
+                        {'Čas': format_minute(minute), 'Výběh': enclosure_name(element_id)}
+                        for minute, element_id in schedule.timeline()
+                    ],
+                    use_container_width=True,
+                    hide_index=True
+                )
 
 def create_interactive_svg_html(svg_content, svg_elements):
     """Vytvoří interaktivní HTML s SVG, které umožňuje klikání na elementy"""
@@ -998,166 +1743,5 @@ def get_type_icon(area_type):
     }
     return icons.get(area_type, '❓')
 
-def generate_interactive_svg(svg_content, configurations):
-    """Generuje SVG s interaktivními atributy a JavaScript funkcionalitou"""
-    try:
-        root = ET.fromstring(svg_content)
-        
-        # Přidat CSS styly pro interaktivitu
-        style_element = ET.Element('style')
-        style_element.text = """
-        .enclosure { 
-            cursor: pointer; 
-            transition: all 0.3s ease; 
-        }
-        .enclosure:hover .enclosure-area { 
-            fill: #20b2aa !important; 
-            stroke: #008b8b !important; 
-            stroke-width: 4 !important; 
-        }
-        .enclosure:hover .animal-icon { 
-            opacity: 1 !important; 
-        }
-        .animal-icon { 
-            opacity: 0; 
-            transition: all 0.3s ease; 
-        }
-        .configured-element { 
-            stroke: #27ae60 !important; 
-            stroke-width: 3 !important; 
-            opacity: 0.8;
-        }
-        .enclosure-pedestrian { fill: #90EE90 !important; }
-        .enclosure-safari { fill: #FFD700 !important; }
-        .path-pedestrian { fill: #DDA0DD !important; }
-        .path-safari { fill: #F0E68C !important; }
-        .water { fill: #87CEEB !important; }
-        .restricted { fill: #FFB6C1 !important; }
-        .facility { fill: #FFA500 !important; }
-        
-        .info-popup {
-            position: fixed;
-            background: white;
-            border: 2px solid #333;
-            border-radius: 10px;
-            padding: 15px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.3);
-            z-index: 1000;
-            max-width: 300px;
-            font-family: Arial, sans-serif;
-        }
-        """
-        
-        # Přidat JavaScript pro interaktivitu
-        script_element = ET.Element('script')
-        script_element.text = """
-        function selectEnclosure(elementId) {
-            // Zobrazit informace o výběhu
-            var element = document.getElementById(elementId);
-            if (!element) return;
-            
-            var enclosureName = element.getAttribute('data-enclosure') || 'Neznámý výběh';
-            var animals = element.getAttribute('data-animals') || 'Žádná zvířata';
-            var animalEmojis = element.getAttribute('data-animal-emojis') || '';
-            var feedingTimes = element.getAttribute('data-feeding-times') || 'Neurčeno';
-            var zone = element.getAttribute('data-zone') || '';
-            
-            // Vytvořit popup
-            var popup = document.createElement('div');
-            popup.className = 'info-popup';
-            popup.innerHTML = 
-                '<h3>' + animalEmojis + ' ' + enclosureName + '</h3>' +
-                '<p><strong>Oblast:</strong> ' + zone + '</p>' +
-                '<p><strong>Zvířata:</strong> ' + animals + '</p>' +
-                '<p><strong>Krmení:</strong> ' + feedingTimes + '</p>' +
-                '<button onclick="closePopup()" style="margin-top:10px; padding:5px 10px; background:#3498db; color:white; border:none; border-radius:5px; cursor:pointer;">Zavřít</button>';
-            
-            // Umístit popup
-            popup.style.left = '50px';
-            popup.style.top = '50px';
-            
-            // Odstranit předchozí popup
-            var existingPopup = document.querySelector('.info-popup');
-            if (existingPopup) {
-                existingPopup.remove();
-            }
-            
-            document.body.appendChild(popup);
-        }
-        
-        function closePopup() {
-            var popup = document.querySelector('.info-popup');
-            if (popup) {
-                popup.remove();
-            }
-        }
-        
-        // Zavřít popup při kliknutí mimo
-        document.addEventListener('click', function(e) {
-            if (!e.target.closest('.enclosure') && !e.target.closest('.info-popup')) {
-                closePopup();
-            }
-        });
-        """
-        
-        # Vložit style a script elementy na začátek SVG
-        root.insert(0, style_element)
-        root.insert(1, script_element)
-        
-        # Přidat interaktivní atributy k nakonfigurovaným elementům
-        for element_id, config in configurations.items():
-            element = root.find(f".//*[@id='{element_id}']")
-            if element is not None:
-                # Přidat základní třídy
-                area_type = config.get('areaType', '')
-                element.set('class', f'configured-element {area_type}')
-                
-                if area_type.startswith('enclosure'):
-                    # Převést element na skupinu pokud není
-                    tag_name = element.tag.split('}')[-1] if '}' in element.tag else element.tag
-                    if tag_name != 'g':
-                        group = ET.Element('g')
-                        group.set('id', element_id + '_group')
-                        group.set('class', f'enclosure configured-element {area_type}')
-                        parent = element.getparent()
-                        if parent is not None:
-                            parent.insert(list(parent).index(element), group)
-                            parent.remove(element)
-                            group.append(element)
-                            element = group
-                    else:
-                        element.set('class', f'enclosure configured-element {area_type}')
-                    
-                    # Přidat atributy
-                    element.set('data-enclosure', config.get('enclosureName', 'Výběh'))
-                    element.set('data-info', config.get('enclosureDescription', ''))
-                    element.set('data-zone', config.get('zone', ''))
-                    element.set('onclick', f"selectEnclosure('{element_id}')")
-                    
-                    # Přidat informace o zvířatech
-                    animals = config.get('animals', [])
-                    if animals:
-                        animal_names = ', '.join([a['name'] for a in animals])
-                        animal_emojis = ''.join([a['emoji'] for a in animals])
-                        element.set('data-animals', animal_names)
-                        element.set('data-animal-emojis', animal_emojis)
-                        element.set('data-animal-count', str(len(animals)))
-                    
-                    # Přidat časy krmení
-                    feeding_times = config.get('feedingTimes', [])
-                    if feeding_times:
-                        element.set('data-feeding-times', ', '.join(feeding_times))
-                
-                elif area_type == 'facility':
-                    element.set('data-facility-type', config.get('facilityType', ''))
-                    element.set('data-facility-name', config.get('facilityName', 'Služba'))
-                    element.set('onclick', f"alert('Služba: {config.get('facilityName', 'Neznámá služba')}')")
-        
-        return ET.tostring(root, encoding='unicode')
-        
-    except Exception as e:
-        st.error(f"Chyba při generování interaktivní SVG: {e}")
-        return svg_content
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,1077 @@
+"""Jádro SVG Zoo Editoru – zpracování SVG bez závislosti na Streamlitu"""
+
+import bisect
+import hashlib
+import html
+import json
+import re
+import threading
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from feeding_schedule import FeedingSchedule
+from svg_optimize import DEDUP_DEFAULT_PRECISION, deduplicate_shapes, optimize_tree
+
+# Exportované SVG používá výchozí jmenný prostor místo prefixu ns0
+ET.register_namespace('', 'http://www.w3.org/2000/svg')
+ET.register_namespace('xlink', 'http://www.w3.org/1999/xlink')
+
+class SvgEngineError(Exception):
+    """Chyba při zpracování SVG v jádře editoru"""
+
+# Počet naparsovaných SVG dokumentů držených v cache (sdílené mezi sezeními)
+PARSE_CACHE_MAX_ENTRIES = 8
+
+# Od této velikosti se SVG parsuje proudově bez stavby celého stromu
+STREAMING_THRESHOLD_BYTES = 20 * 1024 * 1024
+
+# Velikost bloku, po kterém se data předávají proudovému parseru
+STREAMING_CHUNK_SIZE = 1024 * 1024
+
+# Jak často (po kolika elementech) hlásí proudové parsování průběh
+STREAMING_PROGRESS_STEP = 1000
+
+CLICKABLE_TAGS = ('g', 'path', 'polygon', 'circle', 'ellipse', 'rect')
+
+# Značkování SVG: komentáře, CDATA, instrukce a deklarace se vracejí beze změny,
+# u počátečních tagů se zachytí název a atributy
+_MARKUP_RE = re.compile(
+    r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<!.*?>'
+    r'|<(?P<tag>[A-Za-z_][\w:.-]*)'
+    r'(?P<attrs>(?:\s+[^\s=<>/]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*)'
+    r'(?P<end>\s*/?>)',
+    re.DOTALL
+)
+_ATTR_RE = re.compile(r'([^\s=<>/]+)\s*=\s*("[^"]*"|\'[^\']*\')')
+
+_STYLE_FILL_RE = re.compile(r'(?:^|;)\s*fill\s*:\s*([^;]+)')
+
+_ID_ATTR_RE = re.compile(r'\sid\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+def normalize_svg_ids(svg_content):
+    """Zapíše chybějící id klikacích elementů přímo do zdrojového SVG
+    
+    Id se přidělují stejně jako v parse_svg_elements() (element_{pořadí}),
+    takže jsou při opakovaném načtení téhož souboru stabilní. Kolize
+    s id, které už v dokumentu je, se řeší příponou.
+    """
+    used_ids = {html.unescape(a or b) for a, b in _ID_ATTR_RE.findall(svg_content)}
+    count = 0
+    
+    def replace(match):
+        nonlocal count
+        tag = match.group('tag')
+        if tag is None or tag.split(':')[-1] not in CLICKABLE_TAGS:
+            return match.group(0)
+        
+        position = count
+        count += 1
+        attrs = match.group('attrs')
+        if any(attr.group(1) == 'id' for attr in _ATTR_RE.finditer(attrs)):
+            return match.group(0)
+        
+        element_id = f"element_{position}"
+        suffix = 1
+        while element_id in used_ids:
+            element_id = f"element_{position}_{suffix}"
+            suffix += 1
+        used_ids.add(element_id)
+        return f'<{tag} id="{element_id}"{attrs}{match.group("end")}'
+    
+    return _MARKUP_RE.sub(replace, svg_content)
+
+def _element_fill(elem, inherited):
+    """Výplň elementu ze stylu nebo atributu fill, jinak zděděná od předka"""
+    style = elem.get('style')
+    match = _STYLE_FILL_RE.search(style) if style else None
+    fill = match.group(1) if match else elem.get('fill')
+    return fill.strip().lower() if fill else inherited
+
+def _parse_svg_tree(svg_content):
+    """Naparsuje SVG a vrátí kořen stromu a klikací elementy (bez vazby na session)
+    
+    Záznam elementu nese id, tag, id nejbližší nadřazené skupiny (parent)
+    a zděděnou výplň (fill).
+    """
+    root = ET.fromstring(svg_content)
+    elements = []
+    
+    # Průchod do hloubky v pořadí dokumentu, potomci dostanou nadřazenou skupinu a výplň
+    stack = [(root, None, None)]
+    while stack:
+        elem, parent, inherited_fill = stack.pop()
+        tag_name = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
+        fill = _element_fill(elem, inherited_fill)
+        if tag_name in CLICKABLE_TAGS:
+            element_id = elem.get('id', f"element_{len(elements)}")
+            if not elem.get('id'):
+                elem.set('id', element_id)
+            
+            elements.append({
+                'id': element_id,
+                'tag': tag_name,
+                'parent': parent,
+                'fill': fill
+            })
+        
+        if tag_name == 'g' and elem.get('id'):
+            parent = elem.get('id')
+        stack.extend((child, parent, fill) for child in reversed(elem))
+    
+    return root, elements
+
+def _iter_chunks(source, chunk_size=STREAMING_CHUNK_SIZE):
+    """Rozdělí text, bajty nebo otevřený soubor na bloky pro proudový parser"""
+    if isinstance(source, (str, bytes)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        chunk = source.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = source.read(chunk_size)
+
+def _iter_parse_events(source):
+    """Události start/end z proudového parseru (obdoba ET.iterparse i pro text)"""
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    for chunk in _iter_chunks(source):
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+def iter_svg_elements(source):
+    """Proudově prochází SVG (text, bajty nebo soubor) a vrací záznamy klikacích elementů
+    
+    Zpracované podstromy se hned uvolňují, paměť na strom tak zůstává zhruba konstantní
+    (vstup předaný jako text nebo bajty se ovšem drží celý, čte se postupně jen ze souboru).
+    Pořadí i automatická id odpovídají parse_svg_elements().
+    """
+    count = 0
+    ancestors = []
+    contexts = [(None, None)]  # (nadřazená skupina, zděděná výplň) pro potomky
+    
+    for event, elem in _iter_parse_events(source):
+        if event == 'start':
+            tag_name = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
+            parent, inherited_fill = contexts[-1]
+            fill = _element_fill(elem, inherited_fill)
+            element_id = elem.get('id')
+            if tag_name in CLICKABLE_TAGS:
+                element_id = elem.get('id', f"element_{count}")
+                count += 1
+                yield {
+                    'id': element_id,
+                    'tag': tag_name,
+                    'parent': parent,
+                    'fill': fill
+                }
+            contexts.append((element_id if tag_name == 'g' and element_id else parent, fill))
+            ancestors.append(elem)
+        else:
+            # Uvolnit hotový podstrom včetně odkazu z rodiče
+            contexts.pop()
+            ancestors.pop()
+            elem.clear()
+            if ancestors:
+                ancestors[-1].remove(elem)
+
+def stream_map_geometry(source):
+    """Geometrie mapy proudovým průchodem SVG (text, bajty nebo soubor), strom se neuchovává
+
+    Při nevalidním SVG vyhodí ET.ParseError.
+    """
+    # Geometrie potřebuje numpy – načítá se až tady, ne s importem jádra
+    from svg_geometry import MapGeometry
+    return MapGeometry(events=_iter_parse_events(source))
+
+def parse_svg_elements(svg_content, configurations=None):
+    """Parsuje SVG a najde všechny klikací elementy
+    
+    Při nevalidním SVG vyhodí SvgEngineError.
+    """
+    configurations = configurations or {}
+    try:
+        _, elements = _parse_svg_tree(svg_content)
+    except ET.ParseError as e:
+        raise SvgEngineError(f"Chyba při parsování SVG: {e}") from e
+    
+    return [
+        dict(elem, configured=elem['id'] in configurations)
+        for elem in elements
+    ]
+
+def svg_digest(data):
+    """Vrátí otisk obsahu nahraného souboru (klíč do cache parsování)"""
+    return hashlib.sha256(data).hexdigest()
+
+def load_svg_document(data, digest=None, streaming=None, progress=None):
+    """Dekóduje a naparsuje nahrané SVG do slovníku pro cache dokumentů
+    
+    Chyba parsování se vrací v klíči 'error' (text dokumentu zůstává
+    k dispozici), nedekódovatelná data vyhodí SvgEngineError.
+    Chybějící id se zapíší do textu dokumentu (normalize_svg_ids), další
+    zpracování tak pracuje s normalizovanou verzí. Ve proudovém režimu
+    (výchozí pro soubory nad STREAMING_THRESHOLD_BYTES) se strom neuchovává
+    a `progress` dostává průběžný počet nalezených elementů.
+    
+    Proudový režim šetří jen paměť na strom elementů. Text dokumentu se
+    drží celý – vrací se v 'svg_content' – a při normalizaci id existují
+    současně vstupní bajty, dekódovaný text i jeho normalizovaná kopie,
+    špička tak zůstává několikanásobkem velikosti souboru.
+    """
+    if streaming is None:
+        streaming = len(data) > STREAMING_THRESHOLD_BYTES
+    
+    try:
+        svg_content = normalize_svg_ids(data.decode('utf-8'))
+    except UnicodeDecodeError as e:
+        raise SvgEngineError(f"Soubor není v kódování UTF-8: {e}") from e
+    root, elements, error = None, [], None
+    try:
+        if streaming:
+            for elem in iter_svg_elements(svg_content):
+                elements.append(elem)
+                if progress and len(elements) % STREAMING_PROGRESS_STEP == 0:
+                    progress(len(elements))
+        else:
+            root, elements = _parse_svg_tree(svg_content)
+    except ET.ParseError as e:
+        root, elements, error = None, [], str(e)
+    
+    return {
+        'digest': digest or svg_digest(data),
+        'svg_content': svg_content,
+        'root': root,
+        'elements': tuple(elements),
+        'error': error
+    }
+
+class SvgDocumentCache:
+    """Omezená LRU cache naparsovaných SVG dokumentů podle otisku obsahu
+    
+    Uložené dokumenty jsou sdílené mezi sezeními a nesmí se měnit.
+    """
+    
+    def __init__(self, max_entries=PARSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, digest):
+        with self._lock:
+            document = self._documents.get(digest)
+            if document is not None:
+                self._documents.move_to_end(digest)
+            return document
+    
+    def put(self, digest, document):
+        with self._lock:
+            self._documents[digest] = document
+            self._documents.move_to_end(digest)
+            while len(self._documents) > self.max_entries:
+                self._documents.popitem(last=False)
+
+def normalize_search_text(text):
+    """Normalizuje text pro hledání – malá písmena bez diakritiky"""
+    text = str(text)
+    if text.isascii():
+        return text.casefold().strip()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+def _search_terms(element_id, config):
+    """Vrátí hledatelné termíny elementu – id, názvy z konfigurace a jména zvířat"""
+    texts = [element_id]
+    if config:
+        texts += [config.get('enclosureName'), config.get('facilityName'), config.get('areaName')]
+        texts += [animal.get('name') for animal in config.get('animals', [])]
+    
+    terms = set()
+    for text in texts:
+        term = normalize_search_text(text) if text else ''
+        if term:
+            terms.add(term)
+            # Jednotlivá slova kvůli prefixovému hledání ("sav" najde "Africká savana")
+            terms.update(term.split())
+    return terms
+
+# Počet termínů v jednom bloku trigramového filtru vyhledávání
+SEARCH_CHUNK_TERMS = 256
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class ElementSearchIndex:
+    """Invertovaný index elementů pro prefixové i podřetězcové hledání
+    
+    Termíny (id, názvy, zvířata) ukazují na množiny id elementů. Prefixové
+    dotazy půlí seřazený seznam termínů, podřetězce se hledají pomocí
+    str.find v řetězci všech termínů, rozděleném na bloky s trigramovým
+    filtrem. Výsledkem jsou pozice elementů v seznamu, ze kterého byl
+    index postaven.
+    """
+    
+    def __init__(self, elements=(), configurations=None):
+        configurations = configurations or {}
+        self._positions = {}
+        self._terms_by_id = {}
+        self._ids_by_term = {}
+        
+        for position, elem in enumerate(elements):
+            self._positions[elem['id']] = position
+            self._add(elem['id'], configurations.get(elem['id']))
+        
+        self._sorted_terms = sorted(self._ids_by_term)
+        self._rebuild_blob()
+    
+    def _rebuild_blob(self):
+        """Znovu sestaví řetězec termínů pro hledání podřetězců (bez mrtvých termínů)"""
+        self._blob_terms = []
+        self._blob_offsets = []
+        self._chunk_grams = []
+        self._blob = ''
+        self._dead_terms = 0
+        self._append_terms(list(self._ids_by_term))
+    
+    def _append_terms(self, terms):
+        """Připojí termíny na konec řetězce a doplní trigramy jejich bloků"""
+        offset = len(self._blob)
+        for term in terms:
+            if len(self._blob_terms) % SEARCH_CHUNK_TERMS == 0:
+                self._chunk_grams.append(set())
+            self._chunk_grams[-1] |= _trigrams(term)
+            self._blob_terms.append(term)
+            self._blob_offsets.append(offset)
+            offset += len(term) + 1
+        self._blob += ''.join(term + '\n' for term in terms)
+    
+    def _add(self, element_id, config):
+        terms = _search_terms(element_id, config)
+        self._terms_by_id[element_id] = terms
+        new_terms = []
+        for term in terms:
+            ids = self._ids_by_term.get(term)
+            if ids is None:
+                self._ids_by_term[term] = ids = set()
+                new_terms.append(term)
+            ids.add(element_id)
+        return new_terms
+    
+    def _remove(self, element_id):
+        for term in self._terms_by_id.pop(element_id, ()):
+            ids = self._ids_by_term[term]
+            ids.discard(element_id)
+            if not ids:
+                del self._ids_by_term[term]
+                del self._sorted_terms[bisect.bisect_left(self._sorted_terms, term)]
+                self._dead_terms += 1
+    
+    def update(self, element_id, config):
+        """Přeindexuje jeden element po uložení, změně nebo smazání (config=None) konfigurace"""
+        if element_id not in self._positions:
+            return
+        
+        self._remove(element_id)
+        new_terms = self._add(element_id, config)
+        for term in new_terms:
+            bisect.insort(self._sorted_terms, term)
+        
+        # Mrtvé termíny zůstávají v řetězci, dokud jich není víc než živých
+        if self._dead_terms > len(self._ids_by_term):
+            self._rebuild_blob()
+        else:
+            self._append_terms(new_terms)
+    
+    def search(self, query, prefix=False):
+        """Vrátí seřazené pozice elementů, jejichž termín dotaz obsahuje (nebo jím začíná)"""
+        query = normalize_search_text(query)
+        if not query or '\n' in query:
+            return []
+        
+        matched_ids = set()
+        if prefix:
+            terms = self._sorted_terms
+            i = bisect.bisect_left(terms, query)
+            while i < len(terms) and terms[i].startswith(query):
+                matched_ids |= self._ids_by_term[terms[i]]
+                i += 1
+        else:
+            blob, offsets = self._blob, self._blob_offsets
+            grams = _trigrams(query)
+            for chunk, chunk_grams in enumerate(self._chunk_grams):
+                if not grams <= chunk_grams:
+                    continue
+                
+                first = chunk * SEARCH_CHUNK_TERMS
+                last = min(first + SEARCH_CHUNK_TERMS, len(offsets))
+                end = offsets[last] if last < len(offsets) else len(blob)
+                found = blob.find(query, offsets[first], end)
+                while found != -1:
+                    term_index = bisect.bisect_right(offsets, found, first, last) - 1
+                    ids = self._ids_by_term.get(self._blob_terms[term_index])
+                    if ids:
+                        matched_ids |= ids
+                    # Pokračovat až za koncem nalezeného termínu
+                    if term_index + 1 >= len(offsets):
+                        break
+                    found = blob.find(query, offsets[term_index + 1], end)
+        
+        return sorted(self._positions[element_id] for element_id in matched_ids)
+
+HIGHLIGHT_STYLE = """
+        <style>
+            .configured-element { 
+                stroke: #27ae60 !important; 
+                stroke-width: 3 !important; 
+                opacity: 0.8;
+            }
+            .enclosure-pedestrian { fill: #90EE90 !important; }
+            .enclosure-safari { fill: #FFD700 !important; }
+            .path-pedestrian { fill: #DDA0DD !important; }
+            .path-safari { fill: #F0E68C !important; }
+            .water { fill: #87CEEB !important; }
+            .restricted { fill: #FFB6C1 !important; }
+            .facility { fill: #FFA500 !important; }
+        </style>
+        """
+
+def _attr_value(quoted):
+    """Vrátí hodnotu atributu bez uvozovek s rozbalenými entitami"""
+    value = quoted[1:-1]
+    return html.unescape(value) if '&' in value else value
+
+def _add_classes(attrs, id_match, classes):
+    """Doplní třídy do atributů tagu – ke stávajícímu class, jinak za atribut id"""
+    for attr in _ATTR_RE.finditer(attrs):
+        if attr.group(1) == 'class':
+            quote = attr.group(2)[0]
+            existing = attr.group(2)[1:-1].split()
+            merged = existing + [c for c in classes if c not in existing]
+            return (attrs[:attr.start(2)] + quote + ' '.join(merged) + quote +
+                    attrs[attr.end(2):])
+    
+    return attrs[:id_match.end()] + f' class="{" ".join(classes)}"' + attrs[id_match.end():]
+
+def _element_id_attr(attrs):
+    """Najde atribut id v atributech tagu – vrátí (id, shoda atributu) nebo (None, None)"""
+    if 'id' in attrs:
+        for attr in _ATTR_RE.finditer(attrs):
+            if attr.group(1) == 'id':
+                return _attr_value(attr.group(2)), attr
+    return None, None
+
+def inject_element_classes(svg_content, classes_by_id, style=None):
+    """Jedním průchodem dokumentu doplní třídy elementům podle jejich id
+    
+    `classes_by_id` mapuje id elementu na seznam tříd, `style` se vloží hned
+    za počáteční tag <svg>.
+    """
+    pending_style = [style] if style else []
+    
+    def replace(match):
+        tag = match.group('tag')
+        if tag is None:
+            return match.group(0)
+        
+        attrs = match.group('attrs')
+        if pending_style and tag.split(':')[-1] == 'svg' and not match.group('end').endswith('/>'):
+            suffix = pending_style.pop()
+        else:
+            suffix = ''
+        
+        if classes_by_id:
+            element_id, id_attr = _element_id_attr(attrs)
+            classes = classes_by_id.get(element_id)
+            if classes:
+                attrs = _add_classes(attrs, id_attr, classes)
+        
+        return f'<{tag}{attrs}{match.group("end")}{suffix}'
+    
+    return _MARKUP_RE.sub(replace, svg_content)
+
+def highlight_classes(configurations):
+    """Třídy zvýraznění nakonfigurovaných elementů (id → seznam tříd)"""
+    return {
+        element_id: ['configured-element', config['areaType']]
+        for element_id, config in configurations.items()
+        if config.get('areaType')
+    }
+
+def diff_highlight_classes(old, new):
+    """Rozdíl dvou stavů zvýraznění – seznam [id, přidané třídy, odebrané třídy]"""
+    patch = []
+    for element_id in old.keys() | new.keys():
+        before, after = old.get(element_id, []), new.get(element_id, [])
+        if before != after:
+            patch.append([
+                element_id,
+                [c for c in after if c not in before],
+                [c for c in before if c not in after]
+            ])
+    return patch
+
+def render_svg_with_highlights(svg_content, configurations):
+    """Renderuje SVG s vizuálním zvýrazněním nakonfigurovaných elementů"""
+    return inject_element_classes(svg_content, highlight_classes(configurations), style=HIGHLIGHT_STYLE)
+
+class HighlightedDocument:
+    """Zvýrazněný dokument, který se při změně konfigurací jen záplatuje
+    
+    Text se při vytvoření rozdělí na úseky tak, že počáteční tag každého
+    elementu s id je samostatný úsek (i u opakovaných id, stejně jako
+    render_svg_with_highlights se zvýrazní všechny výskyty). update() porovná třídy zvýraznění
+    s předchozím stavem a přepíše jen tagy změněných elementů; rozdíl
+    vrací i jako záplatu pro prohlížeč. `version` roste s každou změnou.
+    """
+    
+    def __init__(self, svg_content, configurations, key=None):
+        self.key = key
+        self.version = 0
+        self.last_patch = []
+        self.classes = highlight_classes(configurations)
+        self._segments = []
+        self._tags = {}  # id → [(index úseku, tag, atributy, konec tagu)] – id se v dokumentu mohou opakovat
+        self._text = None
+        
+        position = 0
+        pending_style = True
+        for match in _MARKUP_RE.finditer(svg_content):
+            tag = match.group('tag')
+            if tag is None:
+                continue
+            attrs, end = match.group('attrs'), match.group('end')
+            element_id, id_attr = _element_id_attr(attrs)
+            is_root = pending_style and tag.split(':')[-1] == 'svg' and not end.endswith('/>')
+            if element_id is None and not is_root:
+                continue
+            
+            self._segments.append(svg_content[position:match.start()])
+            if element_id is not None:
+                self._tags.setdefault(element_id, []).append((len(self._segments), tag, attrs, end))
+            self._segments.append(self._render_tag(tag, attrs, end, self.classes.get(element_id)))
+            if is_root:
+                self._segments.append(HIGHLIGHT_STYLE)
+                pending_style = False
+            position = match.end()
+        self._segments.append(svg_content[position:])
+    
+    @staticmethod
+    def _render_tag(tag, attrs, end, classes):
+        if classes:
+            attrs = _add_classes(attrs, _element_id_attr(attrs)[1], classes)
+        return f'<{tag}{attrs}{end}'
+    
+    def update(self, configurations):
+        """Promítne nové konfigurace, vrátí záplatu (prázdnou, pokud se nic nezměnilo)"""
+        classes = highlight_classes(configurations)
+        patch = diff_highlight_classes(self.classes, classes)
+        for element_id, _, _ in patch:
+            for index, tag, attrs, end in self._tags.get(element_id, ()):
+                self._segments[index] = self._render_tag(tag, attrs, end, classes.get(element_id))
+        
+        self.classes = classes
+        if patch:
+            self.version += 1
+            self.last_patch = patch
+            self._text = None
+        return patch
+    
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = ''.join(self._segments)
+        return self._text
+
+def _svg_tag(root, name):
+    """Vrátí název tagu ve jmenném prostoru kořenového elementu"""
+    if root.tag.startswith('{'):
+        return root.tag[:root.tag.index('}') + 1] + name
+    return name
+
+def build_id_index(root):
+    """Jedním průchodem stromu vytvoří mapu id → (element, rodič, pozice v rodiči)"""
+    index = {}
+    if root.get('id') is not None:
+        index[root.get('id')] = (root, None, None)
+    
+    for parent in root.iter():
+        for position, child in enumerate(parent):
+            child_id = child.get('id')
+            if child_id is not None and child_id not in index:
+                index[child_id] = (child, parent, position)
+    
+    return index
+
+# Styly exportované interaktivní mapy
+EXPORT_STYLE = """
+    .enclosure { 
+        cursor: pointer; 
+        transition: all 0.3s ease; 
+    }
+    .enclosure:hover .enclosure-area { 
+        fill: #20b2aa !important; 
+        stroke: #008b8b !important; 
+        stroke-width: 4 !important; 
+    }
+    .enclosure:hover .animal-icon { 
+        opacity: 1 !important; 
+    }
+    .animal-icon { 
+        opacity: 0; 
+        transition: all 0.3s ease; 
+    }
+    .configured-element { 
+        stroke: #27ae60 !important; 
+        stroke-width: 3 !important; 
+        opacity: 0.8;
+    }
+    .enclosure-pedestrian { fill: #90EE90 !important; }
+    .enclosure-safari { fill: #FFD700 !important; }
+    .path-pedestrian { fill: #DDA0DD !important; }
+    .path-safari { fill: #F0E68C !important; }
+    .water { fill: #87CEEB !important; }
+    .restricted { fill: #FFB6C1 !important; }
+    .facility { fill: #FFA500 !important; }
+    .feeding-soon {
+        stroke: #f39c12 !important;
+        stroke-width: 5 !important;
+        stroke-dasharray: 8 4;
+    }
+    .route-step {
+        stroke: #e74c3c !important;
+        stroke-width: 5 !important;
+        opacity: 1 !important;
+    }
+    
+    .info-popup {
+        position: fixed;
+        background: white;
+        border: 2px solid #333;
+        border-radius: 10px;
+        padding: 15px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.3);
+        z-index: 1000;
+        max-width: 300px;
+        font-family: Arial, sans-serif;
+    }
+    foreignObject .info-popup {
+        position: static;
+    }
+    .info-popup button {
+        margin-top: 10px;
+        padding: 5px 10px;
+        background: #3498db;
+        color: white;
+        border: none;
+        border-radius: 5px;
+        cursor: pointer;
+    }
+    """
+
+# Skript pro export s atributy data-* a onclick na každém elementu
+ATTRIBUTE_EXPORT_SCRIPT = """
+    function selectEnclosure(elementId) {
+        // Zobrazit informace o výběhu
+        var element = document.getElementById(elementId);
+        if (!element) return;
+    
+        var enclosureName = element.getAttribute('data-enclosure') || 'Neznámý výběh';
+        var animals = element.getAttribute('data-animals') || 'Žádná zvířata';
+        var animalEmojis = element.getAttribute('data-animal-emojis') || '';
+        var feedingTimes = element.getAttribute('data-feeding-times') || 'Neurčeno';
+        var zone = element.getAttribute('data-zone') || '';
+    
+        // Vytvořit popup
+        var popup = document.createElement('div');
+        popup.className = 'info-popup';
+        popup.innerHTML = 
+            '<h3>' + animalEmojis + ' ' + enclosureName + '</h3>' +
+            '<p><strong>Oblast:</strong> ' + zone + '</p>' +
+            '<p><strong>Zvířata:</strong> ' + animals + '</p>' +
+            '<p><strong>Krmení:</strong> ' + feedingTimes + '</p>' +
+            '<button onclick="closePopup()" style="margin-top:10px; padding:5px 10px; background:#3498db; color:white; border:none; border-radius:5px; cursor:pointer;">Zavřít</button>';
+    
+        // Umístit popup
+        popup.style.left = '50px';
+        popup.style.top = '50px';
+    
+        // Odstranit předchozí popup
+        var existingPopup = document.querySelector('.info-popup');
+        if (existingPopup) {
+            existingPopup.remove();
+        }
+    
+        document.body.appendChild(popup);
+    }
+    
+    function closePopup() {
+        var popup = document.querySelector('.info-popup');
+        if (popup) {
+            popup.remove();
+        }
+    }
+    
+    // Zavřít popup při kliknutí mimo
+    document.addEventListener('click', function(e) {
+        if (!e.target.closest('.enclosure') && !e.target.closest('.info-popup')) {
+            closePopup();
+        }
+    });
+    """
+
+# Skript pro export s delegací událostí – data čte z bloku #zoo-map-data
+DELEGATED_EXPORT_SCRIPT = """
+    (function () {
+        var SVG_NS = 'http://www.w3.org/2000/svg';
+        var XHTML_NS = 'http://www.w3.org/1999/xhtml';
+        var dataElement = document.getElementById('zoo-map-data');
+        var data = JSON.parse(dataElement.textContent);
+        var root = dataElement.ownerSVGElement || document.documentElement;
+        var popup = null;
+        var routes = data.routes || null;
+        var routeNodes = {}, routeDestinations = {};
+        var routeStart = null;
+        var routeSteps = [];
+    
+        if (routes) {
+            routes.n.forEach(function (id, node) { routeNodes[id] = node; });
+            routes.c.forEach(function (node, index) { routeDestinations[node] = index; });
+        }
+    
+        function clearRoute() {
+            routeSteps.forEach(function (element) { element.classList.remove('route-step'); });
+            routeSteps = [];
+        }
+    
+        function predecessor(codes, node) {
+            // Znak uzlu je pozice předchůdce mezi jeho sousedy, '/' (pod posunem) bez předchůdce
+            var position = codes.charCodeAt(node) - 48;
+            return position < 0 ? -1 : routes.a[node][position];
+        }
+    
+        function showRoute(fromId, toId) {
+            // Trasa se jen poskládá z předchůdců ve stromu nejkratších cest z výchozího cíle
+            var codes = routes.p[routeDestinations[routeNodes[fromId]]];
+            var source = routeNodes[fromId], target = routeNodes[toId];
+            if (target !== source && predecessor(codes, target) < 0) {
+                return false;
+            }
+            clearRoute();
+            for (var node = target; node >= 0; node = predecessor(codes, node)) {
+                var element = document.getElementById(routes.n[node]);
+                if (element) {
+                    element.classList.add('route-step');
+                    routeSteps.push(element);
+                }
+            }
+            return true;
+        }
+    
+        function addRouteButtons(box, id) {
+            if (!routes || !Object.prototype.hasOwnProperty.call(routeNodes, id)
+                    || !Object.prototype.hasOwnProperty.call(routeDestinations, routeNodes[id])) {
+                return;
+            }
+            addLine(box, 'button', '🚩 Odsud').addEventListener('click', function () {
+                routeStart = id;
+                clearRoute();
+                closePopup();
+            });
+            if (routeStart !== null && routeStart !== id) {
+                var button = addLine(box, 'button', '🧭 Trasa sem');
+                button.addEventListener('click', function () {
+                    if (showRoute(routeStart, id)) {
+                        closePopup();
+                    } else {
+                        button.textContent = 'Trasa nenalezena';
+                    }
+                });
+            }
+        }
+    
+        function closePopup() {
+            if (popup) {
+                popup.parentNode.removeChild(popup);
+                popup = null;
+            }
+        }
+    
+        function addLine(parent, tag, text) {
+            // Texty z konfigurace se vkládají jen přes textContent
+            var node = document.createElementNS(XHTML_NS, tag);
+            node.textContent = text;
+            parent.appendChild(node);
+            return node;
+        }
+    
+        function showPopup(id, record, event) {
+            closePopup();
+            var box = document.createElementNS(XHTML_NS, 'div');
+            box.setAttribute('class', 'info-popup');
+    
+            if (record.t === 'e') {
+                var animals = record.a || [];
+                var emojis = animals.map(function (a) { return a[0]; }).join('');
+                var names = animals.map(function (a) { return a[1]; }).join(', ');
+                addLine(box, 'h3', emojis + ' ' + (record.n || 'Výběh'));
+                addLine(box, 'p', 'Oblast: ' + (record.z || ''));
+                addLine(box, 'p', 'Zvířata: ' + (names || 'Žádná zvířata'));
+                addLine(box, 'p', 'Krmení: ' + ((record.f || []).join(', ') || 'Neurčeno'));
+                if (record.d) {
+                    addLine(box, 'p', record.d);
+                }
+            } else {
+                addLine(box, 'h3', 'Služba: ' + (record.n || 'Neznámá služba'));
+            }
+            addRouteButtons(box, id);
+            addLine(box, 'button', 'Zavřít').addEventListener('click', closePopup);
+    
+            // Popup u místa kliknutí, velikost v pixelech nezávisle na měřítku mapy
+            var ctm = root.getScreenCTM();
+            var point = root.createSVGPoint();
+            point.x = event.clientX;
+            point.y = event.clientY;
+            if (ctm) {
+                point = point.matrixTransform(ctm.inverse());
+            }
+            popup = document.createElementNS(SVG_NS, 'foreignObject');
+            popup.setAttribute('width', '320');
+            popup.setAttribute('height', '260');
+            popup.setAttribute('transform',
+                'translate(' + point.x + ',' + point.y + ') scale(' + (ctm ? 1 / ctm.a : 1) + ')');
+            popup.appendChild(box);
+            root.appendChild(popup);
+        }
+    
+        // Jediný delegovaný handler – hledá nejbližšího předka s konfigurací
+        root.addEventListener('click', function (event) {
+            if (popup) {
+                if (popup.contains(event.target)) {
+                    return;
+                }
+            }
+            for (var node = event.target; node; node = node.parentNode) {
+                if (node.id) {
+                    if (Object.prototype.hasOwnProperty.call(data.elements, node.id)) {
+                        showPopup(node.id, data.elements[node.id], event);
+                        return;
+                    }
+                }
+                if (node === root) {
+                    break;
+                }
+            }
+            closePopup();
+        });
+    
+        // Nejbližší krmení – osa je seřazená, stačí najít začátek okna a projít jen krmení v něm
+        var feeding = data.feeding || null;
+        var feedingSoon = [];
+    
+        function lowerBound(values, value) {
+            var low = 0, high = values.length;
+            while (low < high) {
+                var middle = (low + high) >> 1;
+                if (values[middle] < value) {
+                    low = middle + 1;
+                } else {
+                    high = middle;
+                }
+            }
+            return low;
+        }
+    
+        function markUpcomingFeedings() {
+            feedingSoon.forEach(function (element) { element.classList.remove('feeding-soon'); });
+            feedingSoon = [];
+            var now = new Date();
+            var minute = now.getHours() * 60 + now.getMinutes();
+            var count = feeding.t.length;
+            var start = lowerBound(feeding.t, minute);
+            for (var i = 0; i < count; i++) {
+                // Za koncem dne pokračuje od rána
+                var index = (start + i) % count;
+                if ((feeding.t[index] - minute + 1440) % 1440 >= feeding.w) {
+                    break;
+                }
+                var element = document.getElementById(feeding.e[index]);
+                if (element) {
+                    element.classList.add('feeding-soon');
+                    feedingSoon.push(element);
+                }
+            }
+        }
+    
+        if (feeding) {
+            markUpcomingFeedings();
+            setInterval(markUpcomingFeedings, 60000);
+        }
+    
+        window.closePopup = closePopup;
+    })();
+    """
+
+def _export_record(config):
+    """Kompaktní záznam konfigurace pro datový blok exportu (jen neprázdná pole)
+    
+    Klíče: t – typ (e výběh, f služba), n – název, d – popis, z – oblast,
+    a – zvířata [emoji, jméno], f – časy krmení, k – druh služby.
+    """
+    area_type = config.get('areaType', '')
+    if area_type.startswith('enclosure'):
+        record = {
+            't': 'e',
+            'n': config.get('enclosureName', 'Výběh'),
+            'd': config.get('enclosureDescription', ''),
+            'z': config.get('zone', ''),
+            'a': [[a['emoji'], a['name']] for a in config.get('animals', [])],
+            'f': config.get('feedingTimes', [])
+        }
+    else:
+        record = {
+            't': 'f',
+            'n': config.get('facilityName', 'Služba'),
+            'k': config.get('facilityType', '')
+        }
+    return {key: value for key, value in record.items() if value}
+
+def build_interactive_tree(svg_content, configurations, event_delegation=True, routes=False, geometry=None):
+    """Sestaví strom interaktivní SVG (bez serializace)
+    
+    S `event_delegation` se konfigurace vloží jednou jako kompaktní JSON
+    a kliknutí obsluhuje jediný handler na kořenovém SVG. Jinak dostane
+    každý výběh a služba vlastní atributy data-* a onclick.
+    S `event_delegation` obsahuje datový blok i seřazenou časovou osu
+    krmení, podle které stránka zvýrazní nejbližší krmení.
+    S `routes` (jen s `event_delegation`) přidá do datového bloku tabulku
+    nejkratších tras mezi výběhy a službami, viz route_graph.RouteGraph;
+    `geometry` je již spočítaná geometrie mapy, jinak se spočítá ze stromu.
+    Při nevalidním SVG vyhodí SvgEngineError.
+    """
+    try:
+        root = ET.fromstring(svg_content)
+    except ET.ParseError as e:
+        raise SvgEngineError(f"Chyba při generování interaktivní SVG: {e}") from e
+    
+    # Přidat CSS styly pro interaktivitu
+    style_element = ET.Element(_svg_tag(root, 'style'))
+    style_element.text = EXPORT_STYLE
+    
+    # Přidat JavaScript pro interaktivitu
+    script_element = ET.Element(_svg_tag(root, 'script'))
+    script_element.text = DELEGATED_EXPORT_SCRIPT if event_delegation else ATTRIBUTE_EXPORT_SCRIPT
+    
+    # Vložit style a script elementy na začátek SVG (datový blok musí být před skriptem)
+    root.insert(0, style_element)
+    if event_delegation:
+        data_element = ET.Element(_svg_tag(root, 'script'))
+        data_element.set('id', 'zoo-map-data')
+        data_element.set('type', 'application/json')
+        root.insert(1, data_element)
+    root.insert(2 if event_delegation else 1, script_element)
+    
+    # Index id → (element, rodič) místo prohledávání stromu pro každou konfiguraci
+    id_index = build_id_index(root)
+    records = {}
+    export_ids = {}
+    
+    # Přidat interaktivní atributy k nakonfigurovaným elementům
+    for element_id, config in configurations.items():
+        element, parent, position = id_index.get(element_id, (None, None, None))
+        if element is not None:
+            # Přidat základní třídy
+            area_type = config.get('areaType', '')
+            element.set('class', f'configured-element {area_type}')
+    
+            if area_type.startswith('enclosure'):
+                # Převést element na skupinu pokud není
+                tag_name = element.tag.split('}')[-1] if '}' in element.tag else element.tag
+                if tag_name != 'g':
+                    if parent is not None:
+                        group = ET.Element(_svg_tag(root, 'g'))
+                        group.set('id', element_id + '_group')
+                        group.set('class', f'enclosure configured-element {area_type}')
+                        # Nahradit element skupinou na stejné pozici (ostatní pozice se nemění)
+                        parent[position] = group
+                        group.tail, element.tail = element.tail, None
+                        group.append(element)
+                        element = group
+                else:
+                    element.set('class', f'enclosure configured-element {area_type}')
+    
+                if event_delegation:
+                    # Data nese případná obalová skupina, proto její id
+                    export_ids[element_id] = element.get('id')
+                    records[element.get('id')] = _export_record(config)
+                    continue
+    
+                # Přidat atributy
+                element.set('data-enclosure', config.get('enclosureName', 'Výběh'))
+                element.set('data-info', config.get('enclosureDescription', ''))
+                element.set('data-zone', config.get('zone', ''))
+                element.set('onclick', f"selectEnclosure('{element.get('id')}')")
+    
+                # Přidat informace o zvířatech
+                animals = config.get('animals', [])
+                if animals:
+                    animal_names = ', '.join([a['name'] for a in animals])
+                    animal_emojis = ''.join([a['emoji'] for a in animals])
+                    element.set('data-animals', animal_names)
+                    element.set('data-animal-emojis', animal_emojis)
+                    element.set('data-animal-count', str(len(animals)))
+    
+                # Přidat časy krmení
+                feeding_times = config.get('feedingTimes', [])
+                if feeding_times:
+                    element.set('data-feeding-times', ', '.join(feeding_times))
+    
+            elif area_type == 'facility':
+                if event_delegation:
+                    records[element_id] = _export_record(config)
+                    continue
+    
+                element.set('data-facility-type', config.get('facilityType', ''))
+                element.set('data-facility-name', config.get('facilityName', 'Služba'))
+                # Název jako JS řetězec přes json.dumps (uvozovky ani apostrofy ho nerozbijí)
+                message = json.dumps(f"Služba: {config.get('facilityName', 'Neznámá služba')}", ensure_ascii=False)
+                element.set('onclick', f"alert({message})")
+    
+    if event_delegation:
+        payload = {'elements': records}
+        feeding = FeedingSchedule(configurations).export_table(export_ids)
+        if feeding is not None:
+            payload['feeding'] = feeding
+        if routes:
+            # Trasy a geometrie potřebují numpy – načítají se jen pro export s trasami
+            from route_graph import RouteGraph
+            from svg_geometry import MapGeometry
+            if geometry is None:
+                geometry = MapGeometry(root)
+            table = RouteGraph(geometry, configurations).route_table()
+            if table is not None:
+                table['n'] = [export_ids.get(element_id, element_id) for element_id in table['n']]
+                payload['routes'] = table
+        data_element.text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    
+    return root
+
+def serialize_svg_tree(root):
+    """Převede strom SVG zpět na text"""
+    return ET.tostring(root, encoding='unicode')
+
+def generate_interactive_svg(svg_content, configurations, event_delegation=True, precision=None,
+                             deduplicate=False, routes=False):
+    """Generuje SVG s interaktivními atributy a JavaScript funkcionalitou
+    
+    S `precision` (počet desetinných míst) se geometrie před serializací
+    optimalizuje, viz svg_optimize.optimize_tree. S `deduplicate` se
+    opakované tvary sloučí do <symbol>/<use>, viz svg_optimize.deduplicate_shapes.
+    """
+    root = build_interactive_tree(svg_content, configurations, event_delegation=event_delegation, routes=routes)
+    if deduplicate:
+        deduplicate_shapes(root, DEDUP_DEFAULT_PRECISION if precision is None else precision)
+    if precision is not None:
+        optimize_tree(root, precision)
+    return serialize_svg_tree(root)
@@ -0,0 +1,219 @@
+"""Dávkový export interaktivních SVG map z příkazové řádky (bez Streamlitu)
+
+Ve vstupní složce se ke každé mapě `mapa.svg` hledají konfigurace
+`mapa.json` a `mapa.<varianta>.json` (např. sezónní rozložení). Pokud
+ve složce leží i mapa `mapa.<varianta>.svg`, patří konfigurace jí (vždy
+mapě s nejdelším shodným názvem). Každá
+dvojice se exportuje do `<výstup>/<název konfigurace>.svg`, dvojice se
+zpracovávají paralelně v samostatných procesech.
+
+Použití:
+    python svg_export_cli.py mapy/ export/ --jobs 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from pathlib import Path
+
+from svg_compress import EXPORT_FORMATS, available_formats, write_svg_variants
+from svg_engine import build_interactive_tree, normalize_svg_ids
+from svg_optimize import DEDUP_DEFAULT_PRECISION, deduplicate_shapes, optimize_tree
+
+def _config_owner(config_path, svg_stems):
+    """Název mapy, ke které konfigurace patří – nejdelší `mapa` s názvem `mapa.json` nebo `mapa.*.json`"""
+    name = config_path.name[:-len('.json')]
+    owners = [stem for stem in svg_stems if name == stem or name.startswith(stem + '.')]
+    return max(owners, key=len) if owners else None
+
+def find_export_jobs(input_dir, output_dir):
+    """Najde dvojice (SVG, konfigurace, výstup) ve vstupní složce"""
+    svg_paths = sorted(Path(input_dir).glob('*.svg'))
+    svg_stems = {svg_path.stem for svg_path in svg_paths}
+    jobs = []
+    for svg_path in svg_paths:
+        config_paths = [svg_path.with_suffix('.json')]
+        config_paths += sorted(svg_path.parent.glob(f'{svg_path.stem}.*.json'))
+        for config_path in config_paths:
+            if config_path.is_file() and _config_owner(config_path, svg_stems) == svg_path.stem:
+                output_path = Path(output_dir) / (config_path.name[:-len('.json')] + '.svg')
+                jobs.append((str(svg_path), str(config_path), str(output_path)))
+    return jobs
+
+def load_configurations(config_path):
+    """Načte konfigurace z exportu editoru (nebo z holého slovníku id → konfigurace)"""
+    with open(config_path, encoding='utf-8') as f:
+        config_data = json.load(f)
+    if isinstance(config_data, dict) and 'configurations' in config_data:
+        return config_data['configurations']
+    return config_data
+
+def export_map(svg_path, config_path, output_path, event_delegation=True, precision=None, deduplicate=False,
+               formats=('svg',), routes=False):
+    """Vyexportuje jednu dvojici SVG + konfigurace, běží v pracovním procesu
+
+    Každý z `formats` (viz svg_compress.EXPORT_FORMATS) se zapíše vedle
+    výstupu s vlastní příponou, všechny v jednom průchodu serializace.
+    """
+    result = {'svg': svg_path, 'config': config_path, 'output': output_path, 'error': None}
+    tmp_paths = {}
+    started = time.perf_counter()
+    try:
+        with open(svg_path, encoding='utf-8') as f:
+            svg_content = normalize_svg_ids(f.read())
+        configurations = load_configurations(config_path)
+
+        export_started = time.perf_counter()
+        root = build_interactive_tree(svg_content, configurations, event_delegation=event_delegation, routes=routes)
+        if deduplicate:
+            result['symbols'] = deduplicate_shapes(
+                root, DEDUP_DEFAULT_PRECISION if precision is None else precision
+            )['symbols']
+        if precision is not None:
+            result['saved_bytes'] = optimize_tree(root, precision)['saved_bytes']
+
+        # Zápis přes dočasné soubory, aby nezůstal rozepsaný výstup
+        base = output_path[:-len('.svg')] if output_path.endswith('.svg') else output_path
+        for name in formats:
+            path = base + EXPORT_FORMATS[name]['suffix']
+            tmp_paths[path] = path + '.tmp'
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(tmp_path, 'wb')) for tmp_path in tmp_paths.values()]
+            written = write_svg_variants(root, list(zip(formats, files)))
+        result['export_seconds'] = time.perf_counter() - export_started
+
+        for path, tmp_path in tmp_paths.items():
+            os.replace(tmp_path, path)
+
+        result['configured'] = len(configurations)
+        result['bytes'] = written['raw_bytes']
+        result['written'] = written['written']
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        for tmp_path in tmp_paths.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def run_batch(jobs, workers=None, event_delegation=True, precision=None, deduplicate=False, formats=('svg',),
+              routes=False, report=print):
+    """Spustí export všech dvojic v procesovém poolu a vrátí výsledky v pořadí dokončení
+
+    Selhání pracovního procesu (pád, nedostatek paměti, nepřenositelný
+    výsledek) se zapíše jako chyba dané dvojice a dávka pokračuje.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                export_map, *job,
+                event_delegation=event_delegation,
+                precision=precision,
+                deduplicate=deduplicate,
+                formats=formats,
+                routes=routes
+            ): (job, time.perf_counter())
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                (svg_path, config_path, output_path), submitted = futures[future]
+                result = {
+                    'svg': svg_path, 'config': config_path, 'output': output_path,
+                    'error': f"{type(e).__name__}: {e}",
+                    'seconds': time.perf_counter() - submitted
+                }
+            results.append(result)
+            if result['error']:
+                report(f"❌ {result['config']}: {result['error']} ({result['seconds']:.2f} s)")
+            else:
+                saved = f", optimalizace −{result['saved_bytes'] / 1024:.0f} kB" if 'saved_bytes' in result else ''
+                if 'symbols' in result:
+                    saved += f", symbolů {result['symbols']}"
+                compressed = ''.join(
+                    f", {name} {size / 1024:.0f} kB" for name, size in result['written'].items() if name != 'svg'
+                )
+                report(
+                    f"✅ {result['output']}: {result['configured']} konfigurací, "
+                    f"{result['bytes'] / 1024:.0f} kB za {result['seconds']:.2f} s "
+                    f"(export {result['export_seconds']:.2f} s{saved}){compressed}"
+                )
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dávkový export interaktivních SVG map zoo")
+    parser.add_argument('input_dir', help="složka s mapami *.svg a konfiguracemi *.json")
+    parser.add_argument('output_dir', help="složka pro exportované SVG")
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help="počet pracovních procesů (výchozí: počet jader CPU)"
+    )
+    parser.add_argument(
+        '--attributes',
+        action='store_true',
+        help="místo kompaktního datového bloku zapsat data-* a onclick ke každému elementu"
+    )
+    parser.add_argument(
+        '--precision',
+        type=int,
+        default=None,
+        help="optimalizovat geometrii a zaokrouhlit souřadnice na daný počet desetinných míst"
+    )
+    parser.add_argument(
+        '--dedupe',
+        action='store_true',
+        help="sloučit opakované tvary do <symbol> a nahradit je elementy <use>"
+    )
+    parser.add_argument(
+        '--routes',
+        action='store_true',
+        help="vložit předpočítané nejkratší trasy mezi výběhy a službami (ne s --attributes)"
+    )
+    parser.add_argument(
+        '--compress',
+        action='store_true',
+        help="zapsat i předkomprimované varianty (.svgz, .svg.gz, .svg.zz a s balíčkem brotli .svg.br)"
+    )
+    args = parser.parse_args(argv)
+    if args.routes and args.attributes:
+        parser.error("--routes vyžaduje kompaktní export (bez --attributes)")
+    # Export `mapa.json` se zapisuje jako `mapa.svg` – ve stejné složce by přepsal zdrojovou mapu
+    if Path(args.output_dir).resolve() == Path(args.input_dir).resolve():
+        parser.error("výstupní složka musí být jiná než vstupní (export by přepsal zdrojové mapy)")
+
+    jobs = find_export_jobs(args.input_dir, args.output_dir)
+    if not jobs:
+        print(f"Ve složce {args.input_dir} nejsou žádné dvojice SVG + JSON", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    started = time.perf_counter()
+    results = run_batch(
+        jobs,
+        workers=args.jobs,
+        event_delegation=not args.attributes,
+        precision=args.precision,
+        deduplicate=args.dedupe,
+        formats=available_formats() if args.compress else ('svg',),
+        routes=args.routes
+    )
+    failures = [r for r in results if r['error']]
+
+    print(
+        f"Hotovo: {len(results) - len(failures)}/{len(results)} map "
+        f"za {time.perf_counter() - started:.2f} s, chyb: {len(failures)}"
+    )
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,573 @@
+"""Geometrie elementů mapy – obálky, plochy, těžiště a prostorový index
+
+Tvary se převedou na lomené čáry (křivky a oblouky se vzorkují), body
+všech tvarů se uloží do jednoho pole a transformace, obálky, plochy
+i těžiště se počítají vektorově přes numpy (reduceat po úsecích).
+Skupiny dostanou souhrnné hodnoty svých tvarů.
+"""
+
+import math
+import re
+import xml.etree.ElementTree as ET
+from array import array
+from itertools import chain
+
+import numpy as np
+
+from svg_optimize import absolute_path, parse_path
+
+# Počet úseků, na které se dělí jedna Bézierova křivka
+CURVE_STEPS = 8
+
+# Počet vrcholů mnohoúhelníku nahrazujícího kružnici a elipsu
+ELLIPSE_SEGMENTS = 32
+
+# Nejvýše tolik úhlu oblouku připadne na jeden úsek
+ARC_STEP_RADIANS = math.pi / 8
+
+# Kapacita uzlu R-stromu
+NODE_CAPACITY = 16
+
+# Elementy, jejichž obsah se přímo nevykresluje
+NON_RENDERED_TAGS = ('defs', 'symbol', 'clipPath', 'mask', 'pattern', 'marker', 'foreignObject')
+
+SHAPE_TAGS = ('path', 'polygon', 'polyline', 'rect', 'circle', 'ellipse')
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+_TRANSFORM_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+_NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+_CUBIC_WEIGHTS = [
+    ((1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2, t ** 3)
+    for t in (i / CURVE_STEPS for i in range(1, CURVE_STEPS + 1))
+]
+_QUADRATIC_WEIGHTS = [
+    ((1 - t) ** 2, 2 * (1 - t) * t, t ** 2)
+    for t in (i / CURVE_STEPS for i in range(1, CURVE_STEPS + 1))
+]
+_UNIT_CIRCLE = [
+    (math.cos(2 * math.pi * i / ELLIPSE_SEGMENTS), math.sin(2 * math.pi * i / ELLIPSE_SEGMENTS))
+    for i in range(ELLIPSE_SEGMENTS)
+]
+
+def _multiply(m, n):
+    """Složení afinních matic (a, b, c, d, e, f) – nejdřív n, potom m"""
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + c * b2, b * a2 + d * b2,
+        a * c2 + c * d2, b * c2 + d * d2,
+        a * e2 + c * f2 + e, b * e2 + d * f2 + f,
+    )
+
+def parse_transform(value):
+    """Převede atribut transform na afinní matici (a, b, c, d, e, f)"""
+    matrix = IDENTITY
+    for name, args in _TRANSFORM_RE.findall(value or ''):
+        numbers = [float(n) for n in _NUMBER_RE.findall(args)]
+        if name == 'matrix' and len(numbers) == 6:
+            step = tuple(numbers)
+        elif name == 'translate' and numbers:
+            step = (1.0, 0.0, 0.0, 1.0, numbers[0], numbers[1] if len(numbers) > 1 else 0.0)
+        elif name == 'scale' and numbers:
+            step = (numbers[0], 0.0, 0.0, numbers[1] if len(numbers) > 1 else numbers[0], 0.0, 0.0)
+        elif name == 'rotate' and numbers:
+            angle = math.radians(numbers[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            step = (cos, sin, -sin, cos, 0.0, 0.0)
+            if len(numbers) == 3:
+                cx, cy = numbers[1], numbers[2]
+                step = _multiply(_multiply((1.0, 0.0, 0.0, 1.0, cx, cy), step), (1.0, 0.0, 0.0, 1.0, -cx, -cy))
+        elif name == 'skewX' and numbers:
+            step = (1.0, 0.0, math.tan(math.radians(numbers[0])), 1.0, 0.0, 0.0)
+        elif name == 'skewY' and numbers:
+            step = (1.0, math.tan(math.radians(numbers[0])), 0.0, 1.0, 0.0, 0.0)
+        else:
+            continue
+        matrix = _multiply(matrix, step)
+    return matrix
+
+def _arc_points(x1, y1, rx, ry, rotation, large_arc, sweep, x2, y2):
+    """Body eliptického oblouku (bez počátečního) podle parametrizace středem ze specifikace SVG"""
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0 or (x1 == x2 and y1 == y2):
+        return [(x2, y2)]
+
+    phi = math.radians(rotation)
+    cos, sin = math.cos(phi), math.sin(phi)
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p, y1p = cos * dx + sin * dy, -sin * dx + cos * dy
+
+    # Příliš malé poloměry se zvětší tak, aby oblouk existoval
+    scale = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if scale > 1:
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+
+    numerator = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    denominator = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    factor = math.sqrt(max(0.0, numerator / denominator))
+    if large_arc == sweep:
+        factor = -factor
+    cxp, cyp = factor * rx * y1p / ry, -factor * ry * x1p / rx
+    cx = cos * cxp - sin * cyp + (x1 + x2) / 2
+    cy = sin * cxp + cos * cyp + (y1 + y2) / 2
+
+    start = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    delta = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - start
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+
+    steps = max(1, math.ceil(abs(delta) / ARC_STEP_RADIANS))
+    points = []
+    for i in range(1, steps + 1):
+        angle = start + delta * i / steps
+        ex, ey = rx * math.cos(angle), ry * math.sin(angle)
+        points.append((cos * ex - sin * ey + cx, sin * ex + cos * ey + cy))
+    return points
+
+def flatten_path(d, closed=None):
+    """Převede data cesty na seznam obrysů (seznamy bodů)
+
+    Do seznamu `closed` (je-li zadán) se ke každému obrysu připíše, zda
+    ho uzavřel příkaz Z; plocha se počítá, jako by byly uzavřené všechny.
+    """
+    rings, ring_closed = [], []
+    ring = None
+    x = y = 0.0
+    control = None  # poslední řídicí bod pro odraz v S/T
+    previous = None
+    for command, params in absolute_path(parse_path(d)):
+        if command == 'M':
+            x, y = params
+            ring = [(x, y)]
+            rings.append(ring)
+            ring_closed.append(False)
+            previous, control = command, None
+            continue
+        if command == 'Z':
+            if ring:
+                x, y = ring[0]
+                ring_closed[-1] = True
+            ring = None
+            previous, control = command, None
+            continue
+        if ring is None:
+            # Kreslení po Z bez nového M pokračuje z počátku podcesty
+            ring = [(x, y)]
+            rings.append(ring)
+            ring_closed.append(False)
+
+        if command == 'L' or command == 'T' and previous not in ('Q', 'T'):
+            if command == 'T':
+                control = (x, y)
+            ring.append((params[0], params[1]))
+        elif command == 'H':
+            ring.append((params[0], y))
+        elif command == 'V':
+            ring.append((x, params[0]))
+        elif command in ('C', 'S'):
+            if command == 'S':
+                x1, y1 = (2 * x - control[0], 2 * y - control[1]) if previous in ('C', 'S') else (x, y)
+                x2, y2, ex, ey = params
+            else:
+                x1, y1, x2, y2, ex, ey = params
+            ring.extend(
+                (w0 * x + w1 * x1 + w2 * x2 + w3 * ex, w0 * y + w1 * y1 + w2 * y2 + w3 * ey)
+                for w0, w1, w2, w3 in _CUBIC_WEIGHTS
+            )
+            control = (x2, y2)
+        elif command in ('Q', 'T'):
+            if command == 'T':
+                x1, y1 = 2 * x - control[0], 2 * y - control[1]
+                ex, ey = params
+            else:
+                x1, y1, ex, ey = params
+            ring.extend(
+                (w0 * x + w1 * x1 + w2 * ex, w0 * y + w1 * y1 + w2 * ey)
+                for w0, w1, w2 in _QUADRATIC_WEIGHTS
+            )
+            control = (x1, y1)
+        elif command == 'A':
+            ring.extend(_arc_points(x, y, *params))
+
+        x, y = ring[-1]
+        previous = command
+    if closed is not None:
+        closed.extend(ring_closed)
+    return rings
+
+def _number(elem, name):
+    try:
+        return float(elem.get(name, '0'))
+    except ValueError:
+        return 0.0
+
+def shape_rings(elem, tag, closed=None):
+    """Obrysy jednoho tvaru v jeho lokálních souřadnicích
+
+    Do seznamu `closed` (je-li zadán) se ke každému obrysu připíše, zda je uzavřený.
+    """
+    if tag == 'path':
+        return flatten_path(elem.get('d', ''), closed)
+    if tag in ('polygon', 'polyline'):
+        numbers = [float(n) for n in _NUMBER_RE.findall(elem.get('points', ''))]
+        rings = [list(zip(numbers[0::2], numbers[1::2]))] if len(numbers) >= 2 else []
+        if closed is not None:
+            closed.extend([tag == 'polygon'] * len(rings))
+        return rings
+    if closed is not None:
+        closed.append(True)
+    if tag == 'rect':
+        x, y = _number(elem, 'x'), _number(elem, 'y')
+        width, height = _number(elem, 'width'), _number(elem, 'height')
+        return [[(x, y), (x + width, y), (x + width, y + height), (x, y + height)]]
+    cx, cy = _number(elem, 'cx'), _number(elem, 'cy')
+    if tag == 'circle':
+        rx = ry = _number(elem, 'r')
+    else:
+        rx, ry = _number(elem, 'rx'), _number(elem, 'ry')
+    return [[(cx + rx * cos, cy + ry * sin) for cos, sin in _UNIT_CIRCLE]]
+
+def _local_name(tag):
+    return tag.split('}')[-1] if isinstance(tag, str) else ''
+
+def _view_box(elem):
+    numbers = [float(n) for n in _NUMBER_RE.findall(elem.get('viewBox', ''))]
+    if len(numbers) == 4 and numbers[2] > 0 and numbers[3] > 0:
+        return tuple(numbers)
+    return None
+
+def _tree_events(root):
+    """Události (start, end) průchodu stromem v pořadí dokumentu, jako z proudového parseru"""
+    stack = [(root, False)]
+    while stack:
+        elem, done = stack.pop()
+        if done:
+            yield 'end', elem
+            continue
+        yield 'start', elem
+        stack.append((elem, True))
+        stack.extend((child, False) for child in reversed(elem))
+
+class SpatialIndex:
+    """R-strom sestavený metodou Sort-Tile-Recursive nad obdélníky (min_x, min_y, max_x, max_y)
+
+    Listy se seřadí do svislých pásů podle středu x a v pásu podle středu y,
+    vyšší úrovně vzniknou po skupinách NODE_CAPACITY sousedních uzlů. Dotaz
+    prochází úrovně shora a v každé testuje všechny kandidáty najednou.
+    """
+
+    def __init__(self, bboxes, node_capacity=NODE_CAPACITY):
+        boxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        self.node_capacity = node_capacity
+        self.items = self._str_order(boxes)
+
+        # Úrovně od kořene k listům, děti uzlu j leží na indexech j*kapacita …
+        level = boxes[self.items]
+        self.levels = [level]
+        while len(level) > node_capacity:
+            starts = np.arange(0, len(level), node_capacity)
+            level = np.column_stack([
+                np.minimum.reduceat(level[:, 0], starts),
+                np.minimum.reduceat(level[:, 1], starts),
+                np.maximum.reduceat(level[:, 2], starts),
+                np.maximum.reduceat(level[:, 3], starts),
+            ])
+            self.levels.insert(0, level)
+
+    def _str_order(self, boxes):
+        count = len(boxes)
+        if count == 0:
+            return np.zeros(0, dtype=np.intp)
+        centers_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        centers_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        leaves = math.ceil(count / self.node_capacity)
+        slice_size = math.ceil(math.sqrt(leaves)) * self.node_capacity
+
+        by_x = np.argsort(centers_x, kind='stable')
+        order = []
+        for start in range(0, count, slice_size):
+            strip = by_x[start:start + slice_size]
+            order.append(strip[np.argsort(centers_y[strip], kind='stable')])
+        return np.concatenate(order)
+
+    def _search(self, test):
+        if not len(self.items):
+            return self.items
+        candidates = np.arange(len(self.levels[0]))
+        for depth, boxes in enumerate(self.levels):
+            if depth:
+                children = (candidates[:, None] * self.node_capacity + np.arange(self.node_capacity)).ravel()
+                candidates = children[children < len(boxes)]
+            candidates = candidates[test(boxes[candidates])]
+            if not len(candidates):
+                break
+        return self.items[candidates]
+
+    def query_point(self, x, y):
+        """Indexy obdélníků, které obsahují bod"""
+        return self._search(lambda b: (b[:, 0] <= x) & (x <= b[:, 2]) & (b[:, 1] <= y) & (y <= b[:, 3]))
+
+    def query_rect(self, min_x, min_y, max_x, max_y):
+        """Indexy obdélníků, které zasahují do daného obdélníku"""
+        return self._search(lambda b: (b[:, 0] <= max_x) & (min_x <= b[:, 2]) & (b[:, 1] <= max_y) & (min_y <= b[:, 3]))
+
+class MapGeometry:
+    """Obálky, plochy a těžiště všech tvarů a skupin s id v mapě
+
+    Řádky polí odpovídají `ids`: nejdřív tvary v pořadí dokumentu, za nimi
+    skupiny. Souřadnice jsou po uplatnění transformací předků.
+    """
+
+    def __init__(self, root=None, events=None):
+        """Geometrie ze stromu `root`, nebo z událostí (start, end) proudového parseru
+
+        Z událostí se hotové podstromy hned uvolňují, strom dokumentu se
+        tak v paměti celý nikdy nedrží.
+        """
+        coords = array('d')  # x0, y0, x1, y1, … všech bodů za sebou
+        ring_starts = []
+        open_ring_ends = []  # index posledního bodu otevřených obrysů
+        shape_point_starts = []
+        transforms = []
+        self.ids, self.tags = [], []
+        self.view_box = None
+        groups = []  # (id, první tvar, index za posledním tvarem)
+
+        release = events is not None
+        if events is None:
+            events = _tree_events(root)
+
+        # Události v pořadí dokumentu; otevřené elementy nesou (matice, otevřená skupina)
+        frames = []
+        ancestors = []
+        open_groups = []
+        skipped = 0  # hloubka uvnitř nevykreslovaného obsahu nebo potomků tvaru
+        for event, elem in events:
+            if event == 'start':
+                ancestors.append(elem)
+                if skipped:
+                    skipped += 1
+                    continue
+                tag = _local_name(elem.tag)
+                if not frames:
+                    self.view_box = _view_box(elem)
+                if tag in NON_RENDERED_TAGS:
+                    skipped = 1
+                    continue
+                matrix = frames[-1][0] if frames else IDENTITY
+                if elem.get('transform'):
+                    matrix = _multiply(matrix, parse_transform(elem.get('transform')))
+
+                if tag in SHAPE_TAGS:
+                    skipped = 1
+                    closed = []
+                    try:
+                        rings = [
+                            (ring, is_closed) for ring, is_closed in zip(shape_rings(elem, tag, closed), closed) if ring
+                        ]
+                    except (ValueError, TypeError, ZeroDivisionError):
+                        rings = []
+                    if not rings:
+                        continue
+                    shape_point_starts.append(len(coords) // 2)
+                    for ring, is_closed in rings:
+                        ring_starts.append(len(coords) // 2)
+                        coords.extend(chain.from_iterable(ring))
+                        if not is_closed:
+                            open_ring_ends.append(len(coords) // 2 - 1)
+                    transforms.append(matrix)
+                    self.ids.append(elem.get('id'))
+                    self.tags.append(tag)
+                    continue
+
+                is_group = tag == 'g' or not frames
+                if is_group:
+                    open_groups.append((elem.get('id') if tag == 'g' else None, len(self.ids)))
+                frames.append((matrix, is_group))
+                continue
+
+            ancestors.pop()
+            if skipped:
+                skipped -= 1
+            elif frames.pop()[1]:
+                group_id, first = open_groups.pop()
+                if group_id and len(self.ids) > first:
+                    groups.append((group_id, first, len(self.ids)))
+            if release:
+                elem.clear()
+                if ancestors:
+                    ancestors[-1].remove(elem)
+
+        self.shape_count = len(self.ids)
+        self._compute_shapes(coords, ring_starts, shape_point_starts, transforms)
+        # Hrana z bodu k následníkovi existuje, kromě uzavírací hrany otevřených obrysů
+        self.edges = np.ones(len(self.points), dtype=bool)
+        self.edges[np.array(open_ring_ends, dtype=np.intp)] = False
+        self._compute_groups(groups)
+        self._rows = {element_id: row for row, element_id in enumerate(self.ids) if element_id}
+        self.index = SpatialIndex(self.bboxes)
+
+    def _compute_shapes(self, coords, ring_starts, shape_point_starts, transforms):
+        points = np.frombuffer(coords, dtype=float).reshape(-1, 2) if len(coords) else np.zeros((0, 2))
+        x, y = points[:, 0], points[:, 1]
+        shape_starts = np.array(shape_point_starts, dtype=np.intp)
+        ring_starts = np.array(ring_starts, dtype=np.intp)
+
+        # Transformace tvaru rozprostřená na jeho body
+        point_shape = np.repeat(np.arange(len(shape_starts)), np.diff(np.append(shape_starts, len(x))))
+        matrices = np.array(transforms, dtype=float).reshape(-1, 6)
+        world_x = matrices[point_shape, 0] * x + matrices[point_shape, 2] * y + matrices[point_shape, 4]
+        world_y = matrices[point_shape, 1] * x + matrices[point_shape, 3] * y + matrices[point_shape, 5]
+        self.points = np.column_stack([world_x, world_y])
+        self.point_starts = np.append(shape_starts, len(x))
+
+        # Následník každého bodu v jeho obrysu (poslední bod navazuje na první)
+        following = np.arange(1, len(x) + 1)
+        if len(ring_starts):
+            following[np.append(ring_starts[1:], len(x)) - 1] = ring_starts
+        self.following = following
+
+        if not len(shape_starts):
+            self.bboxes = np.zeros((0, 4))
+            self.areas = np.zeros(0)
+            self.centroids = np.zeros((0, 2))
+            return
+
+        self.bboxes = np.column_stack([
+            np.minimum.reduceat(world_x, shape_starts),
+            np.minimum.reduceat(world_y, shape_starts),
+            np.maximum.reduceat(world_x, shape_starts),
+            np.maximum.reduceat(world_y, shape_starts),
+        ])
+
+        # Shoelace a těžiště mnohoúhelníku, součty po tvarech
+        next_x, next_y = world_x[following], world_y[following]
+        cross = world_x * next_y - next_x * world_y
+        signed = np.add.reduceat(cross, shape_starts) / 2
+        moment_x = np.add.reduceat((world_x + next_x) * cross, shape_starts)
+        moment_y = np.add.reduceat((world_y + next_y) * cross, shape_starts)
+        self.areas = np.abs(signed)
+
+        centers = np.column_stack([
+            (self.bboxes[:, 0] + self.bboxes[:, 2]) / 2,
+            (self.bboxes[:, 1] + self.bboxes[:, 3]) / 2,
+        ])
+        flat = self.areas < 1e-12
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centroids = np.column_stack([moment_x, moment_y]) / (6 * signed)[:, None]
+        centroids[flat] = centers[flat]
+        self.centroids = centroids
+
+    def _compute_groups(self, groups):
+        # Rozsah tvarů každé skupiny (první tvar, index za posledním) v pořadí řádků skupin
+        self.group_shapes = [(first, end) for _, first, end in groups]
+        if not groups:
+            return
+        # Tvary skupiny tvoří souvislý úsek; reduceat přes dvojice (začátek, konec) a každý druhý výsledek
+        bounds = np.array([(first, end) for _, first, end in groups], dtype=np.intp).ravel()
+
+        def reduce(ufunc, values):
+            padded = np.concatenate([values, values[:1]])
+            return ufunc.reduceat(padded, bounds)[::2]
+
+        areas = reduce(np.add, self.areas)
+        weighted_x = reduce(np.add, self.centroids[:, 0] * self.areas)
+        weighted_y = reduce(np.add, self.centroids[:, 1] * self.areas)
+        bboxes = np.column_stack([
+            reduce(np.minimum, self.bboxes[:, 0]),
+            reduce(np.minimum, self.bboxes[:, 1]),
+            reduce(np.maximum, self.bboxes[:, 2]),
+            reduce(np.maximum, self.bboxes[:, 3]),
+        ])
+        centers = np.column_stack([(bboxes[:, 0] + bboxes[:, 2]) / 2, (bboxes[:, 1] + bboxes[:, 3]) / 2])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centroids = np.column_stack([weighted_x, weighted_y]) / areas[:, None]
+        flat = areas < 1e-12
+        centroids[flat] = centers[flat]
+
+        self.ids += [group_id for group_id, _, _ in groups]
+        self.tags += ['g'] * len(groups)
+        self.bboxes = np.vstack([self.bboxes, bboxes])
+        self.areas = np.concatenate([self.areas, areas])
+        self.centroids = np.vstack([self.centroids, centroids])
+
+    @classmethod
+    def from_svg(cls, svg_content):
+        """Spočítá geometrii z textu SVG (při nevalidním SVG vyhodí ET.ParseError)"""
+        return cls(ET.fromstring(svg_content))
+
+    def extent(self):
+        """Oblast mapy (x, y, šířka, výška) – z viewBox, jinak z obálky všech tvarů; None bez tvarů"""
+        if self.view_box is not None:
+            return self.view_box
+        if not len(self.bboxes):
+            return None
+        min_x, min_y = self.bboxes[:, 0].min(), self.bboxes[:, 1].min()
+        width = max(self.bboxes[:, 2].max() - min_x, 1.0)
+        height = max(self.bboxes[:, 3].max() - min_y, 1.0)
+        return (float(min_x), float(min_y), float(width), float(height))
+
+    def row(self, element_id):
+        return self._rows.get(element_id)
+
+    def info(self, element_id):
+        """Obálka, plocha a těžiště elementu, nebo None pro element bez geometrie"""
+        row = self._rows.get(element_id)
+        if row is None:
+            return None
+        return {
+            'bbox': tuple(float(v) for v in self.bboxes[row]),
+            'area': float(self.areas[row]),
+            'centroid': tuple(float(v) for v in self.centroids[row]),
+        }
+
+    def segments(self, element_id):
+        """Úsečky obrysů elementu (u skupiny všech jejích tvarů) jako pole počátků a konců (N×2)"""
+        row = self._rows.get(element_id)
+        if row is None:
+            return np.zeros((0, 2)), np.zeros((0, 2))
+        first, end = (row, row + 1) if row < self.shape_count else self.group_shapes[row - self.shape_count]
+        indexes = np.arange(self.point_starts[first], self.point_starts[end])
+        indexes = indexes[self.edges[indexes]]
+        return self.points[indexes], self.points[self.following[indexes]]
+
+    def elements_in_rect(self, min_x, min_y, max_x, max_y):
+        """Id elementů, jejichž obálka zasahuje do obdélníku"""
+        return [self.ids[row] for row in self.index.query_rect(min_x, min_y, max_x, max_y)]
+
+    def elements_near(self, element_id, distance):
+        """Id elementů, jejichž obálka je nejvýše `distance` od obálky daného elementu
+
+        Výsledek je seřazený podle vzdálenosti těžišť, bez elementu samotného.
+        """
+        row = self._rows.get(element_id)
+        if row is None:
+            return []
+        min_x, min_y, max_x, max_y = self.bboxes[row]
+        rows = self.index.query_rect(min_x - distance, min_y - distance, max_x + distance, max_y + distance)
+        rows = rows[rows != row]
+        offsets = self.centroids[rows] - self.centroids[row]
+        rows = rows[np.argsort(np.hypot(offsets[:, 0], offsets[:, 1]), kind='stable')]
+        return [self.ids[r] for r in rows]
+
+    def _contains(self, row, x, y):
+        # Test paprskem (pravidlo sudé–liché) přes všechny hrany obrysů tvaru
+        start, end = self.point_starts[row], self.point_starts[row + 1]
+        px, py = self.points[start:end, 0], self.points[start:end, 1]
+        following = self.following[start:end]
+        qx, qy = self.points[following, 0], self.points[following, 1]
+        crosses = (py > y) != (qy > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            at_x = px + (y - py) * (qx - px) / (qy - py)
+        return bool(np.count_nonzero(crosses & (x < at_x)) % 2)
+
+    def elements_at(self, x, y):
+        """Id tvarů, které obsahují bod, od nejmenší plochy (nejvýše položený tvar nerozlišuje)"""
+        rows = self.index.query_point(x, y)
+        rows = rows[rows < self.shape_count]
+        rows = rows[np.argsort(self.areas[rows], kind='stable')]
+        return [self.ids[row] for row in rows if self._contains(row, x, y)]
@@ -0,0 +1,44 @@
+"""Obousměrná komponenta mapy – kliknutí vrací do Pythonu souřadnice a id elementu"""
+
+import os
+
+import streamlit.components.v1 as components
+
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'svg_map_frontend')
+_svg_map = components.declare_component('svg_map', path=_FRONTEND_DIR)
+
+def svg_map(svg_key, version, svg_content=None, patch=None, patch_from=None, selected=None, height=520,
+            key=None):
+    """Vykreslí mapu a vrátí poslední kliknutí {'x', 'y', 'id', 'nonce'} nebo None
+
+    S `svg_content` prohlížeč vloží celé SVG (dokument `svg_key` ve verzi
+    `version`). Bez něj jen použije `patch` – seznam [id, přidané třídy,
+    odebrané třídy] – na dokument ve verzi `patch_from`. Když verze
+    nesedí (komponenta se mezitím připojila znovu), vrátí
+    {'resync': True, 'nonce': …} a příště je potřeba poslat celé SVG.
+    Hodnota zůstává stejná i v dalších rerunech, nová událost změní 'nonce'.
+    """
+    return _svg_map(
+        svg=svg_content,
+        svg_key=svg_key,
+        version=version,
+        patch=patch,
+        patch_from=patch_from,
+        selected=selected,
+        height=height,
+        key=key,
+        default=None
+    )
+
+def resolve_click(click, geometry, known_ids):
+    """Vybere element pod kliknutím
+
+    U vnořených a překrývajících se tvarů rozhodne prostorový index
+    (nejmenší tvar obsahující bod), jinak se použije cíl kliknutí v DOM.
+    """
+    for element_id in geometry.elements_at(click['x'], click['y']):
+        if element_id in known_ids:
+            return element_id
+    if click.get('id') in known_ids:
+        return click['id']
+    return None
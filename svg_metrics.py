@@ -0,0 +1,199 @@
+"""Měření fází jednoho rerunu editoru a export metrik v textovém formátu Prometheus"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+
+METRIC_PREFIX = 'svg_editor'
+
+# Počet posledních rerunů (všech sezení), které soubor s metrikami obsahuje
+METRICS_FILE_MAX_RERUNS = 1000
+
+# Metriky v pořadí souboru: (název, typ, popis)
+METRIC_FAMILIES = (
+    ('stage_seconds', 'gauge', 'Doba fáze rerunu editoru'),
+    ('rerun_seconds', 'gauge', 'Celková doba rerunu editoru'),
+    ('widgets', 'gauge', 'Počet widgetů vytvořených ve smyčkách editoru (mřížka, přehled, konfigurace)'),
+    ('bytes_sent', 'gauge', 'Velikost hlavního obsahu odeslaného do prohlížeče'),
+)
+
+_SAMPLE_RE = re.compile(r'^(\w+)\{(.*)\} (\S+)(?: (\d+))?$')
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+class RerunMetrics:
+    """Časy fází jednoho rerunu, počet vytvořených widgetů a odeslaných bajtů
+
+    Fáze se měří „po kolech“: begin() uzavře právě běžící fázi a začne
+    novou, opakované fáze se sčítají.
+    """
+
+    def __init__(self, rerun, session='default'):
+        self.rerun = rerun
+        self.session = session
+        self.timestamp = time.time()
+        self.stages = {}
+        self.widgets = 0
+        self.bytes_sent = 0
+        self.total_seconds = None
+        self._started = time.perf_counter()
+        self._stage = None
+        self._stage_started = None
+
+    def begin(self, stage):
+        """Ukončí aktuální fázi a začne měřit další"""
+        now = time.perf_counter()
+        self._close(now)
+        self._stage, self._stage_started = stage, now
+
+    def _close(self, now):
+        if self._stage is not None:
+            self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._stage_started
+            self._stage = None
+
+    def count_widgets(self, count=1):
+        """Připočte widgety vytvořené v rerunu"""
+        self.widgets += count
+
+    def add_bytes(self, payload):
+        """Připočte velikost obsahu posílaného do prohlížeče (text nebo počet bajtů)"""
+        self.bytes_sent += payload if isinstance(payload, int) else len(payload.encode('utf-8'))
+
+    def finish(self):
+        """Uzavře poslední fázi a zaznamená celkový čas rerunu"""
+        now = time.perf_counter()
+        self._close(now)
+        self.total_seconds = now - self._started
+        return self
+
+    def as_dict(self):
+        row = {'rerun': self.rerun, 'celkem_ms': round((self.total_seconds or 0) * 1000, 2)}
+        row.update({stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()})
+        row.update({'widgety': self.widgets, 'kB': round(self.bytes_sent / 1024, 1)})
+        return row
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _unescape_label(value):
+    return re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n' else m.group(1), value)
+
+def _samples(family, metrics):
+    """Dvojice (štítky navíc, hodnota) jedné metriky z měření rerunu"""
+    if family == 'stage_seconds':
+        return [(f',stage="{_escape_label(stage)}"', f'{seconds:.6f}') for stage, seconds in metrics.stages.items()]
+    if family == 'rerun_seconds':
+        return [('', f'{metrics.total_seconds or 0:.6f}')]
+    if family == 'widgets':
+        return [('', str(metrics.widgets))]
+    return [('', str(metrics.bytes_sent))]
+
+def format_prometheus(metrics_list):
+    """Převede měření do textového formátu Prometheus (s časovými razítky vzorků)
+
+    Vzorky každé metriky stojí pohromadě pod jejím HELP a TYPE.
+    """
+    lines = []
+    for family, metric_type, description in METRIC_FAMILIES:
+        name = f'{METRIC_PREFIX}_{family}'
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+        for metrics in metrics_list:
+            labels = f'session="{_escape_label(metrics.session)}",rerun="{metrics.rerun}"'
+            timestamp_ms = int(metrics.timestamp * 1000)
+            for extra, value in _samples(family, metrics):
+                lines.append(f'{name}{{{labels}{extra}}} {value} {timestamp_ms}')
+    return '\n'.join(lines) + '\n'
+
+def parse_prometheus(text):
+    """Načte měření rerunů z textu zapsaného format_prometheus; cizí řádky přeskočí"""
+    reruns = {}
+    for line in text.splitlines():
+        match = _SAMPLE_RE.match(line)
+        if not match or not match.group(1).startswith(f'{METRIC_PREFIX}_'):
+            continue
+        name, raw_labels, raw_value, timestamp_ms = match.groups()
+        try:
+            value = float(raw_value)
+        except ValueError:
+            continue
+        labels = {key: _unescape_label(raw) for key, raw in _LABEL_RE.findall(raw_labels)}
+        key = (labels.get('session', 'default'), labels.get('rerun', ''))
+        metrics = reruns.get(key)
+        if metrics is None:
+            rerun = int(key[1]) if key[1].isdigit() else key[1]
+            metrics = reruns[key] = RerunMetrics(rerun, session=key[0])
+        if timestamp_ms:
+            metrics.timestamp = int(timestamp_ms) / 1000
+        
+        family = name[len(METRIC_PREFIX) + 1:]
+        if family == 'stage_seconds':
+            metrics.stages[labels.get('stage', '')] = value
+        elif family == 'rerun_seconds':
+            metrics.total_seconds = value
+        elif family == 'widgets':
+            metrics.widgets = int(value)
+        elif family == 'bytes_sent':
+            metrics.bytes_sent = int(value)
+    return list(reruns.values())
+
+class MetricsFile:
+    """Soubor s metrikami posledních rerunů ve formátu Prometheus
+
+    Připojením by se vzorky jedné metriky rozpadly do skupin oddělených
+    dalšími metrikami, což striktní parsery odmítnou. Měření se proto drží
+    v paměti (nejvýš `max_reruns`) a soubor se přepisuje celý přes dočasný
+    soubor a os.replace, čtenář nikdy nevidí rozepsaný soubor. Historie se
+    při otevření načte ze stávajícího souboru, restart serveru ani změna
+    cesty tak dřívější měření nezahodí.
+
+    Zápis běží ve vlákně na pozadí – rerun jen předá měření a na disk
+    nečeká; několik měření za sebou se zapíše jedním přepsáním. Instance
+    se sdílí mezi sezeními.
+    """
+
+    def __init__(self, path, max_reruns=METRICS_FILE_MAX_RERUNS):
+        self.path = path
+        self.error = None
+        self._history = deque(maxlen=max_reruns)
+        self._changed = threading.Condition()
+        self._version = 0
+        self._written_version = 0
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                self._history.extend(parse_prometheus(f.read()))
+        except FileNotFoundError:
+            pass
+        threading.Thread(target=self._write_loop, name='svg-editor-metrics', daemon=True).start()
+
+    def append(self, metrics):
+        """Přidá měření rerunu; soubor přepíše vlákno na pozadí, chybu zápisu hlásí `error`"""
+        with self._changed:
+            self._history.append(metrics)
+            self._version += 1
+            self._changed.notify_all()
+
+    def flush(self, timeout=None):
+        """Počká, až soubor obsahuje všechna přidaná měření; po vypršení vrátí False"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._written_version >= self._version, timeout)
+
+    def _write_loop(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._version > self._written_version)
+                version, history = self._version, list(self._history)
+            
+            try:
+                temporary = f'{self.path}.tmp'
+                with open(temporary, 'w', encoding='utf-8') as f:
+                    f.write(format_prometheus(history))
+                os.replace(temporary, self.path)
+                error = None
+            except OSError as e:
+                error = str(e)
+            
+            with self._changed:
+                self.error = error
+                self._written_version = version
+                self._changed.notify_all()
@@ -0,0 +1,471 @@
+"""Optimalizace exportovaného SVG – zkrácení dat cest, zaokrouhlení souřadnic
+a odstranění výchozích atributů a nadbytečných mezer"""
+
+import re
+from xml.etree.ElementTree import SubElement
+
+# Počet parametrů jednotlivých příkazů cesty
+PATH_PARAM_COUNTS = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7, 'Z': 0}
+
+# Číselné atributy tvarů, které se zaokrouhlují (jen holá čísla bez jednotek)
+NUMERIC_ATTRS = ('x', 'y', 'width', 'height', 'cx', 'cy', 'r', 'rx', 'ry', 'x1', 'y1', 'x2', 'y2')
+
+# Elementy, jejichž číselné atributy jsou souřadnice mapy – u přechodů, filtrů,
+# masek a vzorků bývají v jednotkách objectBoundingBox (0–1) a zaokrouhlení by je rozbilo
+NUMERIC_ATTR_TAGS = ('rect', 'circle', 'ellipse', 'line', 'image', 'use', 'text')
+
+# Výchozí hodnoty dědičných vlastností – smí se vynechat, jen pokud je nenastavuje předek
+INHERITED_DEFAULTS = {
+    'fill-opacity': '1',
+    'fill-rule': 'nonzero',
+    'clip-rule': 'nonzero',
+    'stroke-opacity': '1',
+    'stroke-width': '1',
+    'stroke-miterlimit': '4',
+    'stroke-dasharray': 'none',
+    'stroke-dashoffset': '0',
+    'stroke-linecap': 'butt',
+    'stroke-linejoin': 'miter',
+    'visibility': 'visible',
+}
+
+# Výchozí hodnoty nedědičných vlastností – lze vynechat vždy
+PLAIN_DEFAULTS = {
+    'opacity': '1',
+    'display': 'inline',
+}
+
+# Elementy, jejichž textový obsah je významný (mezery se v nich nemažou)
+TEXT_CONTENT_TAGS = ('text', 'tspan', 'textPath', 'style', 'script', 'title', 'desc', 'foreignObject')
+
+_SEPARATOR_RE = re.compile(r'[\s,]*')
+_NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_PLAIN_NUMBER_RE = re.compile(r'\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*$')
+_STYLE_PROPERTY_RE = re.compile(r'([\w-]+)\s*:')
+
+def parse_path(d):
+    """Rozloží atribut d na seznam (příkaz, parametry), opakované parametry rozepíše
+
+    Při chybné syntaxi vyhodí ValueError.
+    """
+    segments = []
+    command = None
+    pos = 0
+    while True:
+        pos = _SEPARATOR_RE.match(d, pos).end()
+        if pos >= len(d):
+            break
+
+        char = d[pos]
+        if char.upper() in PATH_PARAM_COUNTS:
+            command = char
+            pos += 1
+            if command in 'Zz':
+                segments.append(('Z', []))
+            else:
+                pos, params = _read_params(d, pos, command)
+                segments.append((command, params))
+        elif command is None or command in 'Zz':
+            raise ValueError(f"Neočekávaný znak v datech cesty na pozici {pos}")
+        else:
+            # Implicitní opakování – za moveto následuje lineto
+            if command in 'Mm':
+                command = 'l' if command == 'm' else 'L'
+            pos, params = _read_params(d, pos, command)
+            segments.append((command, params))
+
+    return segments
+
+def _read_params(d, pos, command):
+    params = []
+    for i in range(PATH_PARAM_COUNTS[command.upper()]):
+        pos = _SEPARATOR_RE.match(d, pos).end()
+        if command in 'Aa' and i in (3, 4):
+            # Příznaky oblouku jsou jednoznakové a nemusí být oddělené
+            if pos < len(d) and d[pos] in '01':
+                params.append(float(d[pos]))
+                pos += 1
+                continue
+            raise ValueError(f"Chybný příznak oblouku na pozici {pos}")
+
+        match = _NUMBER_RE.match(d, pos)
+        if not match:
+            raise ValueError(f"Chybí číslo v datech cesty na pozici {pos}")
+        params.append(float(match.group()))
+        pos = match.end()
+    return pos, params
+
+def absolute_path(segments):
+    """Převede segmenty cesty na absolutní souřadnice (příkazy velkými písmeny)"""
+    result = []
+    x = y = start_x = start_y = 0.0
+    for command, params in segments:
+        upper = command.upper()
+        relative = command != upper
+        if upper == 'Z':
+            result.append(('Z', []))
+            x, y = start_x, start_y
+            continue
+
+        params = list(params)
+        if upper == 'H':
+            params[0] += x if relative else 0
+            x = params[0]
+        elif upper == 'V':
+            params[0] += y if relative else 0
+            y = params[0]
+        else:
+            # U oblouku je souřadnicí jen koncový bod, jinak všechny dvojice
+            first = 5 if upper == 'A' else 0
+            if relative:
+                for i in range(first, len(params), 2):
+                    params[i] += x
+                    params[i + 1] += y
+            x, y = params[-2], params[-1]
+
+        if upper == 'M':
+            start_x, start_y = x, y
+        result.append((upper, params))
+    return result
+
+def format_number(value, precision):
+    """Zformátuje číslo na daný počet desetinných míst v nejkratším tvaru (.5, -.25, 3)"""
+    text = f"{value:.{precision}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text.startswith('0.'):
+        text = text[1:]
+    elif text.startswith('-0.'):
+        text = '-' + text[2:]
+    if text in ('', '-', '-0'):
+        text = '0'
+    return text
+
+def _join_numbers(numbers, previous=None):
+    """Spojí čísla s oddělovačem jen tam, kde je nutný (před '-' ani '.' po desetinném čísle ne)"""
+    parts = []
+    for number in numbers:
+        if previous is not None and not (
+            number[0] == '-' or (number[0] == '.' and '.' in previous)
+        ):
+            parts.append(' ')
+        parts.append(number)
+        previous = number
+    return ''.join(parts), previous
+
+def minify_path(d, precision=2):
+    """Vrátí zkrácená data cesty – zaokrouhlení a volba kratšího z absolutního/relativního zápisu"""
+    return format_path(absolute_path(parse_path(d)), precision)
+
+def format_path(segments, precision=2):
+    """Zapíše absolutní segmenty cesty v nejkratším tvaru
+
+    Relativní souřadnice se počítají ze zaokrouhlených absolutních bodů,
+    takže se chyba zaokrouhlení nesčítá.
+    """
+    output = []
+    implicit = None  # příkaz, který lze zopakovat bez písmena
+    last_number = None
+    x = y = start_x = start_y = 0.0
+
+    for command, params in segments:
+        if command == 'Z':
+            output.append('z')
+            implicit, last_number = None, None
+            x, y = start_x, start_y
+            continue
+
+        rounded = [round(value, precision) for value in params]
+        if command == 'H':
+            candidates = [('H', rounded), ('h', [rounded[0] - x])]
+        elif command == 'V':
+            candidates = [('V', rounded), ('v', [rounded[0] - y])]
+        elif command == 'A':
+            candidates = [('A', rounded), ('a', rounded[:5] + [rounded[5] - x, rounded[6] - y])]
+        else:
+            relative = [value - (x if i % 2 == 0 else y) for i, value in enumerate(rounded)]
+            candidates = [(command, rounded), (command.lower(), relative)]
+
+        best = None
+        for letter, values in candidates:
+            numbers = [format_number(value, precision) for value in values]
+            if letter == implicit:
+                text, last = _join_numbers(numbers, last_number)
+            else:
+                text, last = _join_numbers(numbers)
+                text = letter + text
+            if best is None or len(text) < len(best[0]):
+                best = (text, letter, last)
+
+        text, letter, last_number = best
+        output.append(text)
+        implicit = {'M': 'L', 'm': 'l'}.get(letter, letter)
+
+        if command == 'H':
+            x = rounded[0]
+        elif command == 'V':
+            y = rounded[0]
+        else:
+            x, y = rounded[-2], rounded[-1]
+        if command == 'M':
+            start_x, start_y = x, y
+
+    return ''.join(output)
+
+def minify_points(points, precision=2):
+    """Zaokrouhlí a zkrátí seznam bodů polygonu/polyline"""
+    numbers = [format_number(float(n), precision) for n in _NUMBER_RE.findall(points)]
+    return _join_numbers(numbers)[0]
+
+def _local_name(tag):
+    return tag.split('}')[-1] if isinstance(tag, str) else ''
+
+def _same_value(value, default):
+    value = value.strip()
+    if value == default:
+        return True
+    try:
+        return float(value) == float(default)
+    except ValueError:
+        return False
+
+def _set_properties(elem):
+    """Dědičné vlastnosti, které element nastavuje atributem nebo v atributu style"""
+    if elem.get('class'):
+        # Co nastaví třída, nelze bez CSS zjistit – bere se, jako by nastavila vše
+        return frozenset(INHERITED_DEFAULTS)
+    names = {name for name in INHERITED_DEFAULTS if name in elem.attrib}
+    names.update(
+        name for name in _STYLE_PROPERTY_RE.findall(elem.get('style', '')) if name in INHERITED_DEFAULTS
+    )
+    return names
+
+def optimize_tree(root, precision=2):
+    """Optimalizuje strom SVG na místě a vrátí přehled úspor
+
+    Zaokrouhlí souřadnice na `precision` desetinných míst, zkrátí data cest,
+    vynechá atributy s výchozí hodnotou a smaže mezery mezi elementy.
+    Transformace se nezaokrouhlují (malá chyba v měřítku by se násobila).
+    Dědičné výchozí hodnoty zůstávají, pokud dokument obsahuje blok <style>.
+    """
+    report = {'bytes_before': 0, 'bytes_after': 0, 'paths': 0, 'dropped_attributes': 0, 'whitespace': 0}
+
+    def rewrite(elem, name, value):
+        old = elem.get(name)
+        if value != old:
+            report['bytes_before'] += len(old)
+            report['bytes_after'] += len(value)
+            elem.set(name, value)
+
+    def drop(elem, name):
+        # Mezera, název, rovnítko a uvozovky
+        report['bytes_before'] += len(name) + len(elem.get(name)) + 4
+        report['dropped_attributes'] += 1
+        del elem.attrib[name]
+
+    # Průchod do hloubky s množinou vlastností nastavených předky
+    has_stylesheet = any(_local_name(elem.tag) == 'style' for elem in root.iter())
+    stack = [(root, frozenset(INHERITED_DEFAULTS) if has_stylesheet else frozenset(), False)]
+    while stack:
+        elem, inherited, in_text = stack.pop()
+        tag = _local_name(elem.tag)
+        in_text = in_text or tag in TEXT_CONTENT_TAGS
+
+        d = elem.get('d')
+        if tag == 'path' and d:
+            try:
+                rewrite(elem, 'd', minify_path(d, precision))
+                report['paths'] += 1
+            except ValueError:
+                pass
+
+        points = elem.get('points')
+        if tag in ('polygon', 'polyline') and points:
+            rewrite(elem, 'points', minify_points(points, precision))
+
+        if tag in NUMERIC_ATTR_TAGS:
+            for name in NUMERIC_ATTRS:
+                value = elem.get(name)
+                if value is not None and _PLAIN_NUMBER_RE.match(value):
+                    rewrite(elem, name, format_number(float(value), precision))
+
+        for name, default in PLAIN_DEFAULTS.items():
+            if name in elem.attrib and _same_value(elem.get(name), default):
+                drop(elem, name)
+        for name, default in INHERITED_DEFAULTS.items():
+            if name in elem.attrib and name not in inherited and _same_value(elem.get(name), default):
+                drop(elem, name)
+
+        # Mezery mezi elementy (mimo textový obsah)
+        if not in_text:
+            if elem.text and not elem.text.strip():
+                report['bytes_before'] += len(elem.text)
+                report['whitespace'] += len(elem.text)
+                elem.text = None
+            for child in elem:
+                if child.tail and not child.tail.strip():
+                    report['bytes_before'] += len(child.tail)
+                    report['whitespace'] += len(child.tail)
+                    child.tail = None
+
+        child_inherited = inherited | _set_properties(elem)
+        for child in elem:
+            stack.append((child, child_inherited, in_text))
+
+    report['saved_bytes'] = report['bytes_before'] - report['bytes_after']
+    return report
+
+# Tvary, které se slučují do <symbol>/<use>, a jejich atributy polohy
+DEDUP_ORIGIN_ATTRS = {
+    'path': None,
+    'polygon': None,
+    'polyline': None,
+    'rect': ('x', 'y'),
+    'circle': ('cx', 'cy'),
+    'ellipse': ('cx', 'cy'),
+}
+
+# Kontejnery, jejichž obsah se neslučuje (nevykreslují se přímo nebo jde o text)
+DEDUP_SKIP_TAGS = ('defs', 'symbol', 'clipPath', 'mask', 'pattern', 'marker', 'text', 'foreignObject', 'switch')
+
+# Odhad velikosti jednoho <use> – sloučení se vyplatí, jen když ušetří víc
+DEDUP_USE_OVERHEAD = 65
+
+# Přesnost porovnání tvarů, pokud export nezaokrouhluje souřadnice
+DEDUP_DEFAULT_PRECISION = 3
+
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+def _is_styled_target(elem):
+    """Prvek s třídou, data-* nebo obsluhou událostí – cíl CSS selektorů a delegovaného kliknutí
+
+    Ve stínovém obsahu <use> by ho selektory ani obsluha kliknutí nenašly.
+    """
+    return 'class' in elem.attrib or any(name.startswith(('on', 'data-')) for name in elem.attrib)
+
+def _normalized_shape(elem, tag, precision):
+    """Vrátí (x, y, atributy tvaru posunutého do počátku) nebo None, pokud tvar nelze sloučit"""
+    attrs = dict(elem.attrib)
+    for name in ('id', 'transform'):
+        attrs.pop(name, None)
+    if _is_styled_target(elem):
+        return None
+    # Odkazy url(#…) v jednotkách userSpaceOnUse by se s <use x= y=> posunuly (ořez, maska, přechod)
+    if any('url(' in value for value in attrs.values()):
+        return None
+
+    if tag == 'path':
+        segments = absolute_path(parse_path(attrs.get('d', '')))
+        if not segments or segments[0][0] != 'M':
+            return None
+        x, y = segments[0][1]
+        moved = []
+        for command, params in segments:
+            params = list(params)
+            if command == 'H':
+                params[0] -= x
+            elif command == 'V':
+                params[0] -= y
+            elif command != 'Z':
+                for i in range(5 if command == 'A' else 0, len(params), 2):
+                    params[i] -= x
+                    params[i + 1] -= y
+            moved.append((command, params))
+        attrs['d'] = format_path(moved, precision)
+    elif tag in ('polygon', 'polyline'):
+        numbers = [float(n) for n in _NUMBER_RE.findall(attrs.get('points', ''))]
+        if len(numbers) < 2:
+            return None
+        x, y = numbers[0], numbers[1]
+        moved = [format_number(value - (x if i % 2 == 0 else y), precision) for i, value in enumerate(numbers)]
+        attrs['points'] = _join_numbers(moved)[0]
+    else:
+        origin = []
+        for name in DEDUP_ORIGIN_ATTRS[tag]:
+            value = attrs.pop(name, '0')
+            if not _PLAIN_NUMBER_RE.match(value):
+                return None
+            origin.append(float(value))
+        x, y = origin
+
+    return x, y, attrs
+
+def deduplicate_shapes(root, precision=DEDUP_DEFAULT_PRECISION):
+    """Sloučí opakované tvary do <defs><symbol> a jejich výskyty nahradí <use>
+
+    Tvary se porovnávají podle geometrie posunuté do počátku (zaokrouhlené
+    na `precision` míst) a všech prezentačních atributů. Poloha se přenese
+    do x/y elementu <use>, který si ponechá id i transformaci původního
+    tvaru. Prvky s třídou, data-* nebo obsluhou událostí (tedy i všechny
+    nakonfigurované) zůstávají včetně celého obsahu, stejně jako tvary
+    s odkazem url(#…).
+    """
+    ns = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+    existing_ids = {elem.get('id') for elem in root.iter() if elem.get('id')}
+    shapes = {}  # klíč → [(element, rodič, pozice, x, y)]
+    attrs_by_key = {}
+
+    stack = [root]
+    while stack:
+        parent = stack.pop()
+        for position, elem in enumerate(parent):
+            tag = _local_name(elem.tag)
+            if tag in DEDUP_SKIP_TAGS:
+                continue
+            if tag not in DEDUP_ORIGIN_ATTRS:
+                # Obsah nakonfigurované skupiny (a skupin s třídou či data-*) míří CSS i kliknutí – zůstává
+                if not _is_styled_target(elem):
+                    stack.append(elem)
+                continue
+            if len(elem) or (elem.text and elem.text.strip()):
+                continue
+            try:
+                normalized = _normalized_shape(elem, tag, precision)
+            except ValueError:
+                normalized = None
+            if normalized is None:
+                continue
+
+            x, y, attrs = normalized
+            key = (elem.tag,) + tuple(sorted(attrs.items()))
+            shapes.setdefault(key, []).append((elem, parent, position, x, y))
+            attrs_by_key[key] = attrs
+
+    report = {'symbols': 0, 'instances': 0, 'saved_bytes': 0}
+    defs = root.makeelement(f'{ns}defs', {})
+    for key, instances in shapes.items():
+        attrs = attrs_by_key[key]
+        body = sum(len(name) + len(value) + 4 for name, value in attrs.items())
+        if len(instances) < 2 or (len(instances) - 1) * body <= len(instances) * DEDUP_USE_OVERHEAD:
+            continue
+
+        report['symbols'] += 1
+        symbol_id = f"zoo_shape_{report['symbols']}"
+        while symbol_id in existing_ids:
+            symbol_id += '_'
+        symbol = SubElement(defs, f'{ns}symbol', {'id': symbol_id, 'overflow': 'visible'})
+        SubElement(symbol, key[0], attrs)
+
+        for elem, parent, position, x, y in instances:
+            use = parent.makeelement(f'{ns}use', {})
+            if elem.get('id'):
+                use.set('id', elem.get('id'))
+            # xlink:href pro starší prohlížeče a knihovny, které href bez jmenného prostoru neznají
+            use.set('href', f'#{symbol_id}')
+            use.set(XLINK_HREF, f'#{symbol_id}')
+            if x:
+                use.set('x', format_number(x, precision))
+            if y:
+                use.set('y', format_number(y, precision))
+            if elem.get('transform'):
+                use.set('transform', elem.get('transform'))
+            use.tail = elem.tail
+            parent[position] = use
+
+        report['instances'] += len(instances)
+        report['saved_bytes'] += (len(instances) - 1) * body - len(instances) * DEDUP_USE_OVERHEAD
+
+    # Vložit až po náhradách, aby zaznamenané pozice v kořeni zůstaly platné
+    if report['symbols']:
+        root.insert(0, defs)
+    return report
@@ -0,0 +1,115 @@
+"""Náhled mapy v editoru – zjednodušený přehled a výřezy (dlaždice) pro přiblížení
+
+Úroveň 0 je přehled celé mapy bez tvarů menších než pár pixelů a se
+souřadnicemi zaokrouhlenými na přesnost náhledu. Úroveň z dělí mapu na
+2^z × 2^z dlaždic, každá obsahuje jen tvary zasahující do jejího
+výřezu. Vyrenderované dlaždice se drží v LRU cache mapy.
+"""
+
+import math
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from svg_engine import serialize_svg_tree
+from svg_geometry import MapGeometry
+from svg_optimize import optimize_tree
+
+# Šířka náhledu v pixelech – podle ní se volí přesnost a nejmenší zobrazený tvar
+PREVIEW_WIDTH_PX = 1000
+
+# Tvary menší než tolik pixelů se na dané úrovni vynechají
+MIN_FEATURE_PX = 1.5
+
+# Nejvyšší úroveň přiblížení (16 × 16 dlaždic)
+MAX_ZOOM = 4
+
+# Počet vyrenderovaných dlaždic držených v cache jedné mapy
+TILE_CACHE_MAX_ENTRIES = 64
+
+def _copy_visible(elem, visible, filtered):
+    """Kopie podstromu bez odfiltrovaných tvarů; skupina, ze které nic nezbylo, vrátí None"""
+    copy = elem.makeelement(elem.tag, dict(elem.attrib))
+    copy.text, copy.tail = elem.text, elem.tail
+    for child in elem:
+        child_id = child.get('id')
+        if child_id in filtered and child_id not in visible:
+            continue
+        child_copy = _copy_visible(child, visible, filtered)
+        if child_copy is not None:
+            copy.append(child_copy)
+
+    if elem.tag.split('}')[-1] == 'g' and len(elem) and not len(copy):
+        return None
+    return copy
+
+class MapPreview:
+    """Přehled a dlaždice jedné mapy
+
+    Instance se sdílí mezi sezeními se stejnou mapou, strom ani geometrie
+    se proto nemění a cache dlaždic je chráněná zámkem.
+    """
+
+    def __init__(self, root, geometry=None):
+        self.root = root
+        self.geometry = geometry if geometry is not None else MapGeometry(root)
+        self.extent = self._extent()
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_svg(cls, svg_content, geometry=None):
+        return cls(ET.fromstring(svg_content), geometry)
+
+    def _extent(self):
+        """Oblast mapy (x, y, šířka, výška) – z viewBox, jinak z obálky všech tvarů"""
+        return self.geometry.extent() or (0.0, 0.0, PREVIEW_WIDTH_PX, PREVIEW_WIDTH_PX)
+
+    def tile_rect(self, zoom, column=0, row=0):
+        """Výřez dlaždice (x, y, šířka, výška) v souřadnicích mapy"""
+        x, y, width, height = self.extent
+        tiles = 2 ** zoom
+        return (x + column * width / tiles, y + row * height / tiles, width / tiles, height / tiles)
+
+    def render(self, zoom=0, column=0, row=0):
+        """SVG dlaždice (na úrovni 0 přehled celé mapy), z cache nebo nově vyrenderované"""
+        key = (zoom, column, row)
+        with self._lock:
+            svg = self._tiles.get(key)
+            if svg is not None:
+                self._tiles.move_to_end(key)
+                return svg
+
+        svg = self._render(self.tile_rect(zoom, column, row))
+
+        with self._lock:
+            self._tiles[key] = svg
+            while len(self._tiles) > TILE_CACHE_MAX_ENTRIES:
+                self._tiles.popitem(last=False)
+        return svg
+
+    def _render(self, rect):
+        x, y, width, height = rect
+        units_per_px = max(width, height) / PREVIEW_WIDTH_PX
+        min_size = units_per_px * MIN_FEATURE_PX
+
+        # Tvary zasahující do výřezu a viditelné v jeho měřítku
+        geometry = self.geometry
+        rows = geometry.index.query_rect(x, y, x + width, y + height)
+        rows = rows[rows < geometry.shape_count]
+        sizes = geometry.bboxes[rows]
+        rows = rows[((sizes[:, 2] - sizes[:, 0]) >= min_size) | ((sizes[:, 3] - sizes[:, 1]) >= min_size)]
+        visible = {geometry.ids[r] for r in rows}
+        # Tvary bez id nelze rozlišit, zůstávají vždy (editor id doplňuje při načtení)
+        filtered = set(geometry.ids[:geometry.shape_count])
+        filtered.discard(None)
+
+        tile = _copy_visible(self.root, visible, filtered)
+        tile.set('viewBox', f"{x:.10g} {y:.10g} {width:.10g} {height:.10g}")
+        for name in ('width', 'height'):
+            tile.attrib.pop(name, None)
+
+        # Desetina pixelu náhledu stačí
+        precision = max(0, min(6, math.ceil(1 - math.log10(units_per_px))))
+        optimize_tree(tile, precision)
+        return serialize_svg_tree(tile)